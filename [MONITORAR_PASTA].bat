@@ -0,0 +1,16 @@
+@echo off
+
+:: Ensure the script runs in the same directory as the .bat file
+cd /d %~dp0
+
+:: Watch this folder and rebuild the outputs as files are saved
+echo Watching this folder, close this window to stop...
+python watch.py
+if errorlevel 1 (
+    echo Failed to execute watch.py.
+    pause
+    exit /b
+)
+
+echo watch.py stopped.
+pause
@@ -0,0 +1,80 @@
+from itertools import islice
+import pandas as pd
+from lxml import etree
+from instrumentation import span
+from model import CARTELA_DTYPE, categorical, cep_number, centavos
+
+# Positions of the columns we use in the Arrematantes_Leilao_#####.xls export,
+# which is an HTML table with a title row followed by the header row.
+ARREMATANTES_COLUMNS = {
+    0: 'Cartela',
+    1: 'Nome',
+    5: 'UF',
+    6: 'CEP',
+    11: 'Arrematação'
+}
+HEADER_ROWS = 2
+
+def _cell_text(cell):
+    text = " ".join(cell.xpath("string()").split())
+    return text or None
+
+def _scan_rows(input_file, positions):
+    # Streams the first table row by row, keeping only the wanted cells and
+    # clearing each <tr> so memory does not grow with the export size.
+    row_idx = 0
+    for event, elem in etree.iterparse(input_file, events=("end",), tag=("tr", "table"), html=True):
+        if elem.tag == "table":
+            break
+        if row_idx >= HEADER_ROWS:
+            cells = [child for child in elem if child.tag in ("td", "th")]
+            yield tuple(_cell_text(cells[pos]) if pos < len(cells) else None for pos in positions)
+        row_idx += 1
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+def parse_brazilian_number(values):
+    # "1.234,56" -> 1234.56
+    return pd.to_numeric(
+        values
+        .str.replace(r'[^\d,\-]', '', regex=True)
+        .str.replace(',', '.', regex=False),
+        errors='coerce'
+    ).astype('float64')
+
+def numeric_cartelas(values):
+    # None when any Cartela is not a number (the export's totals line reads
+    # "Total"), in which case the whole column stays as text.
+    try:
+        return pd.to_numeric(values).astype(CARTELA_DTYPE)
+    except (ValueError, TypeError):
+        return None
+
+def typed_arrematantes(df, cartelas=True):
+    with span("parse", rows=len(df)):
+        if 'Cartela' in df and cartelas:
+            numeric = numeric_cartelas(df['Cartela'])
+            if numeric is not None:
+                df['Cartela'] = numeric
+        if 'UF' in df:
+            df['UF'] = categorical(df['UF'])
+        if 'CEP' in df:
+            df['CEP'] = cep_number(df['CEP'])
+        if 'Arrematação' in df:
+            df['Arrematação'] = centavos(parse_brazilian_number(df['Arrematação']))
+    return df
+
+def arrematantes_batches(input_file, batch_rows, columns=ARREMATANTES_COLUMNS):
+    # The export as untyped frames of at most batch_rows rows, in order.
+    rows = _scan_rows(input_file, list(columns))
+    while True:
+        batch = list(islice(rows, batch_rows))
+        if not batch:
+            return
+        yield pd.DataFrame(batch, columns=list(columns.values()), dtype=object)
+
+def read_arrematantes(input_file, columns=ARREMATANTES_COLUMNS):
+    positions = list(columns)
+    df = pd.DataFrame(list(_scan_rows(input_file, positions)), columns=list(columns.values()), dtype=object)
+    return typed_arrematantes(df)
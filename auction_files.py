@@ -0,0 +1,66 @@
+import os
+import re
+
+ARREMATANTES_PREFIX = "Arrematantes_Leilao_"
+COTACOES_PREFIX = "Cotações_Leilão_"
+FICHA_PATTERN = re.compile(r"Ficha_Leilão_\d{5}\.xlsx")
+CONFIG_FILE = "valores.ini"
+
+AUCTION_FILE_PATTERNS = [
+    re.compile(r"Arrematantes_Leilao_(\d+)\.xls$"),
+    re.compile(r"Cotações_Leilão_(\d+)\.xlsx$"),
+    re.compile(r"Ficha_Leilão_(\d{5})\.xlsx")
+]
+
+def list_directory(directory=None):
+    return os.listdir(directory or os.getcwd())
+
+def find_arrematantes(files):
+    return next((file for file in files if file.startswith(ARREMATANTES_PREFIX) and file.endswith(".xls")), None)
+
+def find_cotacoes(files):
+    return next((file for file in files if file.startswith(COTACOES_PREFIX) and file.endswith(".xlsx")), None)
+
+def find_ficha(files):
+    return next((file for file in files if FICHA_PATTERN.match(file)), None)
+
+def file_number(file_name):
+    return os.path.splitext(os.path.basename(file_name))[0].split('_')[-1]
+
+def config_path(directory=None):
+    config_file = os.path.join(directory or os.getcwd(), CONFIG_FILE)
+    if not os.path.exists(config_file):
+        raise FileNotFoundError("Configuration file 'valores.ini' not found in the current directory.")
+    return config_file
+
+def auction_number(file_name):
+    for pattern in AUCTION_FILE_PATTERNS:
+        match = pattern.match(file_name)
+        if match:
+            return match.group(1)
+    return None
+
+def discover_auctions(root):
+    # Groups every auction file under root by (directory, auction number) so
+    # each auction only sees its own Arrematantes, Cotações and Ficha files.
+    auctions = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for file in sorted(filenames):
+            number = auction_number(file)
+            if number:
+                auctions.setdefault((dirpath, number), []).append(file)
+    return auctions
+
+def find_config(directory, root):
+    # The nearest valores.ini between the auction folder and the batch root.
+    directory = os.path.abspath(directory)
+    root = os.path.abspath(root)
+    while True:
+        config_file = os.path.join(directory, CONFIG_FILE)
+        if os.path.exists(config_file):
+            return config_file
+        parent = os.path.dirname(directory)
+        if directory == root or parent == directory:
+            raise FileNotFoundError(f"Configuration file 'valores.ini' not found between '{directory}' and '{root}'.")
+        directory = parent
@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from auction_files import discover_auctions, find_arrematantes, find_cotacoes, find_ficha, find_config
+from config import load_config
+from pipeline import STAGES, add_trace_arguments, apply_trace_arguments, run_pipeline
+
+def applicable_stages(files, stages):
+    # Only run the stages whose inputs this auction has. Quotes are never
+    # regenerated over an existing Cotações file, which staff fill by hand.
+    has_arrematantes = find_arrematantes(files) is not None
+    has_cotacoes = find_cotacoes(files) is not None
+    selected = []
+    if "quotes" in stages and has_arrematantes and not has_cotacoes:
+        selected.append("quotes")
+    if "record" in stages and has_arrematantes and has_cotacoes:
+        selected.append("record")
+    if "list" in stages and ("record" in selected or find_ficha(files) is not None):
+        selected.append("list")
+    return selected
+
+def run_auction(directory, files, stages, config, streaming=False, use_cache=True, update=True):
+    start = time.perf_counter()
+    run_pipeline(stages, directory, streaming, use_cache, files=files, update=update, config=config)
+    return time.perf_counter() - start
+
+def run_batch(root, stages=STAGES, workers=None, streaming=False, use_cache=True, update=True):
+    # Existing Fichas are updated in place by default, so re-running a month's
+    # folder keeps the Situação and Observação staff typed in.
+    auctions = discover_auctions(root)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for (directory, number), files in sorted(auctions.items()):
+            selected = applicable_stages(files, stages)
+            if not selected:
+                results[(directory, number)] = ("skipped", "no input files for the requested stages")
+                continue
+            try:
+                # Auctions sharing a valores.ini share one parsed Config,
+                # which the workers receive instead of reading the file.
+                config = load_config(find_config(directory, root))
+            except (FileNotFoundError, ValueError) as e:
+                results[(directory, number)] = ("failed", str(e))
+                continue
+            future = executor.submit(run_auction, directory, files, selected, config, streaming, use_cache, update)
+            futures[future] = (directory, number, selected)
+        for future in as_completed(futures):
+            directory, number, selected = futures[future]
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                # One bad auction must not abort the rest of the batch.
+                results[(directory, number)] = ("failed", f"{type(e).__name__}: {e}")
+            else:
+                results[(directory, number)] = ("ok", f"{', '.join(selected)} in {elapsed:.2f}s")
+    return results
+
+def print_report(root, results):
+    for (directory, number), (status, detail) in sorted(results.items()):
+        print(f"{status.upper():<8} {number} ({os.path.relpath(directory, root)}): {detail}")
+    failed = sum(1 for status, _ in results.values() if status == "failed")
+    print(f"{len(results)} auctions, {failed} failed")
+    return failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process every auction found under a directory tree.")
+    parser.add_argument("root", nargs="?", default=os.getcwd(), help="folder to search for auction files")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="stages to run for each auction")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (defaults to the CPU count)")
+    parser.add_argument("--streaming", action="store_true", help="write the workbooks in write-only mode")
+    parser.add_argument("--no-cache", action="store_true", help="parse the input files again instead of using the cache")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild Fichas from scratch instead of updating them in place (discards Situação and Observação)")
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    apply_trace_arguments(parser, args)
+    results = run_batch(args.root, args.stages, args.workers, args.streaming, not args.no_cache, not args.rebuild)
+    return 1 if print_report(args.root, results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
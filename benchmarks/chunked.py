@@ -0,0 +1,75 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from record import process_record
+from synthetic import synthetic_bidders, write_arrematantes, write_cotacoes
+
+NUMBER = "00001"
+
+def write_messy_auction(directory, rows, seed=0):
+    # Repeated name/CEP pairs, bidders without a quote and quotes without a
+    # bidder, so every part of the join and the Conferência sheet is used.
+    bidders = synthetic_bidders(rows, seed)
+    for i in range(97, rows, 97):
+        for column in ("nome", "cep"):
+            bidders[column][i] = bidders[column][i - 1]
+    keep = np.ones(rows, dtype=bool)
+    keep[::53] = False
+    quotes = {column: [value for value, kept in zip(values, keep) if kept] for column, values in bidders.items()}
+    quotes["nome"] = [f"{nome} Jr" if i % 71 == 0 else nome for i, nome in enumerate(quotes["nome"])]
+    write_arrematantes(os.path.join(directory, f"Arrematantes_Leilao_{NUMBER}.xls"), bidders)
+    write_cotacoes(os.path.join(directory, f"Cotações_Leilão_{NUMBER}.xlsx"), quotes)
+
+def run(directory, summary_mode, chunk_size):
+    tracemalloc.start()
+    start = time.perf_counter()
+    process_record(streaming=True, use_cache=False, directory=directory, summary_mode=summary_mode, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def workbook_parts(output_file):
+    # Everything but the creation timestamp
+    with zipfile.ZipFile(output_file) as zf:
+        return {name: zf.read(name) for name in zf.namelist() if name != "docProps/core.xml"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the chunked record matches the in-memory one and compare peak memory.")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1, 997, 5_000, 50_000])
+    parser.add_argument("--summary", choices=["formulas", "values"], nargs="+", default=["formulas", "values"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source")
+        os.makedirs(source)
+        write_messy_auction(source, args.rows)
+        shutil.copy(os.path.join(ROOT, "valores.ini"), source)
+        output_name = f"Ficha_Leilão_{NUMBER}.xlsx"
+        print(f"{'summary':<9} {'chunk':>8} {'time (s)':>9} {'peak (MB)':>10}")
+        for summary_mode in args.summary:
+            for chunk_size in [None] + args.chunk_sizes:
+                directory = os.path.join(tmp, f"{summary_mode}-{chunk_size}")
+                shutil.copytree(source, directory)
+                elapsed, peak = run(directory, summary_mode, chunk_size)
+                print(f"{summary_mode:<9} {chunk_size or '-':>8} {elapsed:>9.2f} {peak / 2**20:>10.1f}", flush=True)
+                parts = workbook_parts(os.path.join(directory, output_name))
+                if chunk_size is None:
+                    expected = parts
+                elif parts != expected:
+                    differing = sorted(name for name in expected.keys() | parts.keys() if expected.get(name) != parts.get(name))
+                    raise ValueError(f"Chunked Ficha ({chunk_size} rows) differs in {', '.join(differing)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matching import join_quotes
+from model import categorical, cep_number, centavos
+from synthetic import synthetic_bidders
+
+def synthetic_frames(rows, seed=0):
+    # Quotes come back in a different order than the export, the way staff
+    # re-sort the Cotações sheet before filling it.
+    bidders = synthetic_bidders(rows, seed)
+    arrematantes_df = pd.DataFrame({
+        'Cartela': bidders['cartela'],
+        'Nome': bidders['nome'],
+        'UF': categorical(pd.Series(bidders['uf'])),
+        'CEP': cep_number(pd.Series(bidders['cep'])),
+        'Arrematação': centavos(pd.Series(bidders['arrematacao']))
+    })
+    cotacoes_df = pd.DataFrame({
+        'Nome': [nome.upper() for nome in bidders['nome']],
+        'CEP': arrematantes_df['CEP'],
+        'Modalidade': categorical(pd.Series(bidders['modalidade'])),
+        'Valor': centavos(pd.Series(bidders['valor']))
+    })
+    order = np.random.default_rng(seed).permutation(rows)
+    return arrematantes_df, cotacoes_df.iloc[order].reset_index(drop=True), cotacoes_df['Valor'].to_numpy()
+
+def positional(arrematantes_df, cotacoes_df):
+    # The row-by-row pairing record.py used before the keyed join.
+    return pd.DataFrame({
+        'Nome': cotacoes_df['Nome'],
+        'Cartela': arrematantes_df['Cartela'],
+        'CEP': cotacoes_df['CEP'],
+        'UF': arrematantes_df['UF'],
+        'Modalidade': cotacoes_df['Modalidade'],
+        'Valor': cotacoes_df['Valor'],
+        'Arrematação': arrematantes_df['Arrematação']
+    })
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare positional pairing of bidders and quotes with the keyed join.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'positional (s)':>15} {'joined (s)':>11} {'misquoted':>10} {'unmatched':>10}")
+    for rows in args.sizes:
+        arrematantes_df, cotacoes_df, expected = synthetic_frames(rows)
+        positional_time, paired = best_of(lambda: positional(arrematantes_df, cotacoes_df), args.repeat)
+        join_time, (joined, report) = best_of(lambda: join_quotes(arrematantes_df, cotacoes_df), args.repeat)
+        # Repeated name/CEP pairs may swap quotes between themselves, so the
+        # join is checked on the multiset of quoted values.
+        misquoted = int((paired['Valor'].to_numpy() != expected).sum())
+        unmatched = int((report['Situação'] != "Nome e CEP repetidos").sum())
+        if not np.array_equal(np.sort(joined['Valor'].to_numpy()), np.sort(expected)):
+            raise ValueError(f"The keyed join lost or duplicated quotes at {rows} rows.")
+        print(f"{rows:>10} {positional_time:>15.4f} {join_time:>11.4f} {misquoted:>10} {unmatched:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from list import SEPARATOR, ficha_rows
+from model import CEP_DTYPE, categorical, centavos, percent_factor
+from pricing import shipping_cost, surcharge_table, total_due
+from record import write_ficha_sheet
+from sinks import TextSink, fan_out
+from writer import new_workbook
+
+MODALIDADES = ["RETIRA", "IM", "PAC Min.", "PAC", "2x PAC", "SEDEX", "OUTRO"]
+
+def legacy_generate_list(input_file, output_file):
+    # The full-mode reader and line-by-line writer list.py used before.
+    wb = openpyxl.load_workbook(input_file)
+    sheet = wb.active
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row - 1):
+            col_a = row[0].value
+            col_e = row[4].value
+            col_f = row[5].value
+            col_g = row[6].value
+            col_h = row[7].value
+            col_f_formatted = f'{col_f:,.2f}' if isinstance(col_f, (int, float)) else col_f
+            col_g_formatted = f'{col_g:,.2f}' if isinstance(col_g, (int, float)) else col_g
+            col_h_formatted = f'{col_h:,.2f}' if isinstance(col_h, (int, float)) else col_h
+            f.write(f"{SEPARATOR}\n\n")
+            f.write(f"{col_a}\n")
+            f.write("-----\n")
+            f.write(f"O valor da sua arrematação é: R$ {col_g_formatted}\n")
+            f.write(f"O valor do frete por {col_e} é: R$ {col_f_formatted}\n")
+            f.write(f"O total a pagar é: R$ {col_h_formatted}\n\n")
+
+def streaming_generate_list(input_file, output_file):
+    fan_out(ficha_rows(input_file), [TextSink(output_file)])
+
+def synthetic_ficha(rows, output_file, seed=0):
+    rng = np.random.default_rng(seed)
+    modalidade = categorical(pd.Series(rng.choice(MODALIDADES, rows)))
+    valor_env = shipping_cost(modalidade, centavos(pd.Series(rng.uniform(10, 80, rows).round(2))), surcharge_table(7.0), percent_factor(2.0))
+    arrematacao = centavos(pd.Series(rng.uniform(10, 5000, rows).round(2)))
+    new_df = pd.DataFrame({
+        'Nome': [f"ARREMATANTE {i}" for i in range(rows)],
+        'Cartela': np.arange(rows),
+        'CEP': pd.Series(rng.integers(1_000_000, 99_999_999, rows)).astype(CEP_DTYPE),
+        'UF': categorical(pd.Series(rng.choice(["SP", "RJ", "MG", "RS"], rows))),
+        'Modalidade': modalidade,
+        'Valor Env.': valor_env,
+        'Arrematação': arrematacao,
+        'Total': total_due(arrematacao, valor_env),
+        'Situação': '',
+        'Observação': ''
+    })
+    # In-memory mode writes the <dimension> element up front, as Excel does;
+    # write-only files lack it and make read-only loads scan the sheet twice.
+    wb = new_workbook(streaming=False)
+    write_ficha_sheet(wb.create_sheet(title="Ficha"), new_df)
+    wb.save(output_file)
+
+def measure(func, *args):
+    # Timed and memory-traced separately, since tracemalloc slows every
+    # allocation down.
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy list generator with the streaming one.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ficha_file = os.path.join(tmp, "Ficha_Leilão_00000.xlsx")
+        synthetic_ficha(args.rows, ficha_file)
+        legacy_output = os.path.join(tmp, "legacy.txt")
+        streaming_output = os.path.join(tmp, "streaming.txt")
+        print(f"{'generator':>10} {'time (s)':>10} {'rows/s':>10} {'peak MiB':>10}")
+        for name, func, output in (
+            ("legacy", legacy_generate_list, legacy_output),
+            ("streaming", streaming_generate_list, streaming_output)
+        ):
+            elapsed, peak = measure(func, ficha_file, output)
+            print(f"{name:>10} {elapsed:>10.2f} {args.rows / elapsed:>10.0f} {peak / 2**20:>10.1f}")
+        with open(legacy_output, encoding='utf-8') as a, open(streaming_output, encoding='utf-8') as b:
+            if a.read() != b.read():
+                raise ValueError("Streaming list differs from the legacy output.")
+
+if __name__ == "__main__":
+    main()
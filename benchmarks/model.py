@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import categorical, cep_number, centavos
+from synthetic import synthetic_bidders
+
+def object_frame(bidders):
+    # The columns as record.py kept them before the typed model.
+    return pd.DataFrame({
+        'Nome': pd.Series(bidders['nome'], dtype=object),
+        'Cartela': bidders['cartela'],
+        'CEP': pd.Series([cep.replace("-", "") for cep in bidders['cep']], dtype=object),
+        'UF': pd.Series(bidders['uf'], dtype=object),
+        'Modalidade': pd.Series(bidders['modalidade'], dtype=object),
+        'Valor': bidders['valor'],
+        'Arrematação': bidders['arrematacao']
+    })
+
+def typed_frame(df):
+    return pd.DataFrame({
+        'Nome': df['Nome'],
+        'Cartela': df['Cartela'].astype("UInt32"),
+        'CEP': cep_number(df['CEP']),
+        'UF': categorical(df['UF']),
+        'Modalidade': categorical(df['Modalidade']),
+        'Valor': centavos(df['Valor']),
+        'Arrematação': centavos(df['Arrematação'])
+    })
+
+def group_time(df, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df.groupby(['UF', 'Modalidade'], observed=True)['Arrematação'].sum()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of object-string auction rows with the typed model.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'object MiB':>11} {'typed MiB':>10} {'typed w/o Nome':>15} {'object group (s)':>17} {'typed group (s)':>16}")
+    for rows in args.sizes:
+        legacy = object_frame(synthetic_bidders(rows))
+        typed = typed_frame(legacy)
+        legacy_bytes = legacy.memory_usage(deep=True).sum()
+        typed_bytes = typed.memory_usage(deep=True).sum()
+        # Nome stays a string column in both, so it dominates what is left
+        rest = typed.drop(columns='Nome').memory_usage(deep=True).sum()
+        print(
+            f"{rows:>10} {legacy_bytes / 2**20:>11.1f} {typed_bytes / 2**20:>10.1f} {rest / 2**20:>15.1f}"
+            f" {group_time(legacy):>17.4f} {group_time(typed):>16.4f}"
+        )
+
+if __name__ == "__main__":
+    main()
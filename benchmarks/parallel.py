@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import openpyxl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from arrematantes import read_arrematantes
+from config import read_config
+from parallel_writer import part_size, save_workbook
+from record import build_record, ficha_sheets, read_cotacoes
+from synthetic import write_auction
+
+def record_frames(directory, rows):
+    arrematantes_file, cotacoes_file = write_auction(directory, rows)
+    return build_record(read_arrematantes(arrematantes_file), read_cotacoes(cotacoes_file), read_config(os.path.join(ROOT, "valores.ini")))
+
+def sheet_cells(output_file):
+    # What a reader sees: values and resolved formatting, not style ids,
+    # which depend on the order styles were first used.
+    wb = openpyxl.load_workbook(output_file, read_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield ws.title, ws.sheet_state
+            for row in ws.iter_rows():
+                yield tuple(
+                    (cell.coordinate, cell.value, cell.number_format, cell.font, cell.fill, cell.border, cell.alignment)
+                    for cell in row if cell.value is not None or cell.has_style
+                )
+    finally:
+        wb.close()
+
+def settings(output_file):
+    wb = openpyxl.load_workbook(output_file)
+    return [
+        (ws.title, ws.freeze_panes, sorted((key, dim.width) for key, dim in ws.column_dimensions.items()),
+         [(str(dv.sqref), dv.formula1) for dv in ws.data_validations.dataValidation])
+        for ws in wb.worksheets
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and parallel writing of the record workbook.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--check-settings", action="store_true", help="also compare widths, panes and validations (loads the whole workbooks)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        new_df, report = record_frames(tmp, args.rows)
+        serial_file = os.path.join(tmp, "serial.xlsx")
+        start = time.perf_counter()
+        save_workbook(serial_file, ficha_sheets(new_df, report, 5.0), streaming=True)
+        serial_time = time.perf_counter() - start
+        print(f"{'workers':>8} {'time (s)':>10} {'speedup':>8}")
+        print(f"{'serial':>8} {serial_time:>10.2f} {1:>7.1f}x")
+        for workers in args.workers:
+            parallel_file = os.path.join(tmp, f"parallel-{workers}.xlsx")
+            start = time.perf_counter()
+            sheets = ficha_sheets(new_df, report, 5.0, rows_per_part=part_size(len(new_df), workers))
+            save_workbook(parallel_file, sheets, streaming=True, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>8} {elapsed:>10.2f} {serial_time / elapsed:>7.1f}x")
+            for serial, parallel in zip(sheet_cells(serial_file), sheet_cells(parallel_file), strict=True):
+                if serial != parallel:
+                    raise ValueError(f"Parallel workbook with {workers} workers differs: {serial} != {parallel}")
+            if args.check_settings and settings(serial_file) != settings(parallel_file):
+                raise ValueError(f"Parallel workbook with {workers} workers has different sheet settings.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import categorical, centavos, percent_factor, reais
+from pricing import shipping_cost, surcharge_table, total_due
+
+MODALIDADES = ["RETIRA", "IM", "PAC Min.", "PAC", "2x PAC", "SEDEX", "OUTRO"]
+
+def legacy_pricing(df, pacote_extra, seguro):
+    # The row-wise lambdas record.py used before the vectorized stage.
+    valor_env = df.apply(
+        lambda row: (
+            "-" if row['Modalidade'] == "RETIRA" or pd.isna(row['Valor'])
+            else (
+                float(row['Valor']) + (
+                    pacote_extra if row['Modalidade'] in ["PAC", "PAC Min."]
+                    else 2 * pacote_extra if row['Modalidade'] == "2x PAC"
+                    else 0
+                )
+            ) * (1 + seguro / 100)
+        ),
+        axis=1
+    )
+    priced = pd.DataFrame({'Valor Env.': valor_env, 'Arrematação': df['Arrematação']})
+    return priced.apply(
+        lambda row: row['Arrematação']
+        if row['Valor Env.'] == '-'
+        else row['Arrematação'] + row['Valor Env.'],
+        axis=1
+    )
+
+def vectorized_pricing(df, surcharges, seguro_factor):
+    valor_env = shipping_cost(df['Modalidade'], df['Valor'], surcharges, seguro_factor)
+    return total_due(df['Arrematação'], valor_env)
+
+def typed_quotes(df):
+    return pd.DataFrame({
+        'Modalidade': categorical(df['Modalidade']),
+        'Valor': centavos(df['Valor']),
+        'Arrematação': centavos(df['Arrematação'])
+    })
+
+def synthetic_quotes(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Modalidade': rng.choice(MODALIDADES, rows),
+        'Valor': rng.uniform(10, 80, rows).round(2),
+        'Arrematação': rng.uniform(10, 5000, rows).round(2)
+    })
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy row-wise pricing with the vectorized stage.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pacote-extra", type=float, default=7.0)
+    parser.add_argument("--seguro", type=float, default=2.0)
+    args = parser.parse_args()
+
+    surcharges = surcharge_table(args.pacote_extra)
+    seguro_factor = percent_factor(args.seguro)
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for rows in args.sizes:
+        df = synthetic_quotes(rows)
+        typed = typed_quotes(df)
+        legacy_time, legacy = best_of(lambda: legacy_pricing(df, args.pacote_extra, args.seguro), args.repeat)
+        vector_time, vector = best_of(lambda: vectorized_pricing(typed, surcharges, seguro_factor), args.repeat)
+        # Centavo amounts round each value once, so they differ from the
+        # float totals by at most a centavo.
+        if not np.allclose(legacy.astype(float), reais(vector), rtol=0, atol=0.0101, equal_nan=True):
+            raise ValueError(f"Vectorized totals differ from the legacy lambdas at {rows} rows.")
+        print(f"{rows:>10} {legacy_time:>12.4f} {vector_time:>15.4f} {legacy_time / vector_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
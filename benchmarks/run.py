@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_auction
+
+NUMBER = "00001"
+STAGE_OUTPUTS = {
+    "quotes": f"Cotações_Leilão_{NUMBER}.xlsx",
+    "record": f"Ficha_Leilão_{NUMBER}.xlsx",
+    "list": f"Lista_Leilão_{NUMBER}.txt"
+}
+
+def run_stage(stage, directory, extra_args):
+    # Each stage runs in a fresh interpreter, like the .bat entry points, so
+    # wall time includes imports and peak RSS is the stage's own.
+    command = [sys.executable, os.path.join(ROOT, "pipeline.py"), stage, "--directory", directory, "--no-cache"] + extra_args
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    peak_rss = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    else:
+        process.wait()
+    wall_time = time.perf_counter() - start
+    stderr = process.stderr.read().decode("utf-8", errors="replace")
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"Stage '{stage}' failed:\n{stderr}")
+    output_file = os.path.join(directory, STAGE_OUTPUTS[stage])
+    return {
+        "wall_time_s": round(wall_time, 3),
+        "peak_rss_bytes": peak_rss,
+        "output_bytes": os.path.getsize(output_file)
+    }
+
+def benchmark_size(rows, stages, extra_args, seed):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        quotes_dir = os.path.join(tmp, "quotes")
+        record_dir = os.path.join(tmp, "record")
+        os.makedirs(quotes_dir)
+        os.makedirs(record_dir)
+        arrematantes_file, _ = write_auction(record_dir, rows, NUMBER, seed)
+        # Quotes would overwrite the filled Cotações, so it gets its own folder
+        shutil.copy(arrematantes_file, quotes_dir)
+        for directory in (quotes_dir, record_dir):
+            shutil.copy(os.path.join(ROOT, "valores.ini"), directory)
+        for stage in stages:
+            directory = quotes_dir if stage == "quotes" else record_dir
+            results[stage] = run_stage(stage, directory, extra_args)
+            print(f"{rows:>9} {stage:<7} {results[stage]['wall_time_s']:>9.2f}s", flush=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quotes, record and list stages on synthetic auctions.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--stages", nargs="+", choices=list(STAGE_OUTPUTS), default=list(STAGE_OUTPUTS))
+    parser.add_argument("--streaming", action="store_true", help="benchmark the write-only output mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_report.json")
+    args = parser.parse_args()
+
+    extra_args = ["--streaming"] if args.streaming else []
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "streaming": args.streaming,
+        "sizes": {}
+    }
+    for rows in args.rows:
+        report["sizes"][str(rows)] = benchmark_size(rows, args.stages, extra_args, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved as {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from importlib.util import module_from_spec, spec_from_file_location
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from list import ficha_rows
+from sinks import FORMATS, archive, fan_out, list_sinks
+
+# The list benchmark shares its module name with the list stage, so it is
+# loaded by path for its synthetic Ficha.
+_spec = spec_from_file_location("list_benchmark", os.path.join(os.path.dirname(os.path.abspath(__file__)), "list.py"))
+list_benchmark = module_from_spec(_spec)
+_spec.loader.exec_module(list_benchmark)
+synthetic_ficha = list_benchmark.synthetic_ficha
+legacy_generate_list = list_benchmark.legacy_generate_list
+
+NUMBER = "00000"
+
+def one_pass(ficha_file, directory, formats):
+    sinks = list_sinks(directory, NUMBER, formats)
+    count = fan_out(ficha_rows(ficha_file), sinks)
+    outputs = [output for sink in sinks for output in sink.outputs]
+    if "zip" in formats:
+        archive(os.path.join(directory, f"Lista_Leilão_{NUMBER}.zip"), outputs)
+    return count
+
+def pass_per_format(ficha_file, directory, formats):
+    # What exporting each format separately would cost: one Ficha read each
+    for sink in list_sinks(directory, NUMBER, [f for f in formats if f != "zip"]):
+        fan_out(ficha_rows(ficha_file), [sink])
+
+def check_outputs(directory, rows, ficha_file):
+    if sum(1 for _ in ficha_rows(ficha_file)) != rows:
+        raise ValueError("Fan-out lost rows.")
+    expected = os.path.join(directory, "expected.txt")
+    legacy_generate_list(ficha_file, expected)
+    base = os.path.join(directory, f"Lista_Leilão_{NUMBER}")
+    with open(expected, encoding='utf-8') as a, open(f"{base}.txt", encoding='utf-8') as b:
+        if a.read() != b.read():
+            raise ValueError("Text sink differs from the legacy list.")
+    with open(f"{base}.csv", encoding='utf-8-sig', newline='') as f:
+        if sum(1 for _ in csv.reader(f)) != rows + 1:
+            raise ValueError("CSV export is missing rows.")
+    with open(f"{base}.json", encoding='utf-8') as f:
+        bidders = json.load(f)
+    if len(bidders) != rows:
+        raise ValueError("JSON export is missing rows.")
+    # RETIRA shows "-" on the Ficha but must stay a number or null here
+    if any(not isinstance(bidder[key], (int, float, type(None))) for bidder in bidders for key in ("envio", "arrematacao", "total")):
+        raise ValueError("JSON export has non-numeric amounts.")
+    if len(os.listdir(os.path.join(directory, f"Mensagens_Leilão_{NUMBER}"))) != rows:
+        raise ValueError("Missing per-bidder message files.")
+    with zipfile.ZipFile(f"{base}.zip") as zf:
+        if len(zf.namelist()) != rows + 3:
+            raise ValueError("Zip is missing outputs.")
+
+class LockedSink:
+    # An output that cannot be opened, like a CSV open in Excel on Windows,
+    # failing only after the reader has filled its queue.
+    outputs = []
+
+    def open(self):
+        time.sleep(1)
+        raise PermissionError("output is open in another program")
+
+def check_failure(directory):
+    # A failing sink must stop the pass without hanging it, and the outputs
+    # of the previous run must survive untouched.
+    before = {name: open(os.path.join(directory, name), 'rb').read() for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))}
+    errors = []
+
+    def run():
+        try:
+            fan_out([("NOME", "PAC", 1.0, 2.0, 3.0)] * 20_000, list_sinks(directory, NUMBER, FORMATS) + [LockedSink()])
+        except PermissionError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(60)
+    if thread.is_alive():
+        raise ValueError("Fan-out hangs when a sink fails to open.")
+    if not errors:
+        raise ValueError("The sink error was not raised.")
+    after = {name: open(os.path.join(directory, name), 'rb').read() for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))}
+    if after != before:
+        raise ValueError("A failed pass changed the previous outputs.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one pass over the Ficha feeding every list format with one pass per format.")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["text", "csv", "json"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ficha_file = os.path.join(tmp, f"Ficha_Leilão_{NUMBER}.xlsx")
+        synthetic_ficha(args.rows, ficha_file)
+        print(f"{'mode':<16} {'time (s)':>10}")
+        for name, func in (("pass per format", pass_per_format), ("single pass", one_pass)):
+            directory = os.path.join(tmp, name.replace(" ", "-"))
+            os.makedirs(directory)
+            start = time.perf_counter()
+            func(ficha_file, directory, args.formats)
+            print(f"{name:<16} {time.perf_counter() - start:>10.2f}", flush=True)
+
+        directory = os.path.join(tmp, "all")
+        os.makedirs(directory)
+        check_outputs(directory, one_pass(ficha_file, directory, FORMATS), ficha_file)
+        check_failure(directory)
+        print("All formats and a failing sink checked.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import os
+import sys
+from html import escape
+import numpy as np
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rates import IM_WEIGHT_KEYS
+
+# CEP ranges (first five digits) per UF, as assigned by the Correios
+CEP_RANGES = {
+    "SP": (1000, 19999),
+    "RJ": (20000, 28999),
+    "MG": (30000, 39999),
+    "BA": (40000, 48999),
+    "PE": (50000, 56999),
+    "CE": (60000, 63999),
+    "DF": (70000, 72799),
+    "GO": (72800, 76799),
+    "PR": (80000, 87999),
+    "SC": (88000, 89999),
+    "RS": (90000, 99999)
+}
+UF_WEIGHTS = [0.35, 0.12, 0.12, 0.06, 0.04, 0.03, 0.03, 0.03, 0.08, 0.06, 0.08]
+
+FIRST_NAMES = ["Ana", "João", "Maria", "José", "Antônio", "Francisca", "Carlos", "Paula", "Luís", "Márcia"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Conceição", "Pereira", "Ferreira", "Gonçalves", "Araújo", "Lima"]
+
+MODALIDADES = ["RETIRA", "IM", "PAC Min.", "PAC", "2x PAC", "SEDEX", "OUTRO"]
+MODALIDADE_WEIGHTS = [0.15, 0.25, 0.2, 0.2, 0.08, 0.07, 0.05]
+
+EXPORT_COLUMNS = [
+    "Cartela", "Nome", "E-mail", "Telefone", "Cidade", "UF", "CEP",
+    "Lote", "Descrição", "Lance", "Data", "Arrematação"
+]
+
+def brazilian_number(value):
+    # 1234.5 -> "1.234,50"
+    return f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def synthetic_bidders(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    ufs = rng.choice(list(CEP_RANGES), rows, p=UF_WEIGHTS)
+    prefixes = [rng.integers(*CEP_RANGES[uf]) for uf in ufs]
+    return {
+        "cartela": np.arange(1, rows + 1),
+        "nome": [
+            f"{FIRST_NAMES[a]} {LAST_NAMES[b]} {LAST_NAMES[c]}"
+            for a, b, c in rng.integers(0, len(FIRST_NAMES), (rows, 3))
+        ],
+        "uf": ufs,
+        "cep": [f"{prefix:05d}-{suffix:03d}" for prefix, suffix in zip(prefixes, rng.integers(0, 1000, rows))],
+        "arrematacao": rng.lognormal(5.5, 1.0, rows).round(2),
+        "modalidade": rng.choice(MODALIDADES, rows, p=MODALIDADE_WEIGHTS),
+        "valor": rng.uniform(12, 90, rows).round(2),
+        "peso": rng.choice(list(IM_WEIGHT_KEYS), rows)
+    }
+
+def write_arrematantes(output_file, bidders):
+    # The export is an HTML table saved with an .xls extension: a title row,
+    # the header row, one row per bidder and a totals row.
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write('<html><head><meta charset="utf-8"></head><body><table>\n')
+        f.write(f'<tr><td colspan="{len(EXPORT_COLUMNS)}">Arrematantes do Leilão</td></tr>\n')
+        f.write("<tr>" + "".join(f"<th>{column}</th>" for column in EXPORT_COLUMNS) + "</tr>\n")
+        for cartela, nome, uf, cep, arrematacao in zip(
+            bidders["cartela"], bidders["nome"], bidders["uf"], bidders["cep"], bidders["arrematacao"]
+        ):
+            cells = [
+                cartela, escape(nome), "arrematante@example.com", "(11) 99999-0000", "Cidade", uf, cep,
+                cartela, "Lote", brazilian_number(arrematacao), "01/01/2024", brazilian_number(arrematacao)
+            ]
+            f.write("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>\n")
+        totals = [""] * (len(EXPORT_COLUMNS) - 1) + [brazilian_number(bidders["arrematacao"].sum())]
+        f.write("<tr>" + "".join(f"<td>{cell}</td>" for cell in totals) + "</tr>\n")
+        f.write("</table></body></html>\n")
+
+def write_cotacoes(output_file, bidders):
+    # A Cotações sheet as staff leave it after filling Modalidade and Valor
+    # in Excel, with the computed values cached instead of formulas.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Quotes")
+    ws.append(["Nome", "CEP", "Modalidade", "Peso", "Alt.", "Lar.", "Com.", "Valor"])
+    for nome, cep, modalidade, valor, peso in zip(
+        bidders["nome"], bidders["cep"], bidders["modalidade"], bidders["valor"], bidders["peso"]
+    ):
+        cep = int(cep.replace("-", ""))
+        if modalidade == "RETIRA":
+            ws.append([nome.upper(), cep, modalidade, "-", "-", "-", "-", "-"])
+        elif modalidade == "IM":
+            ws.append([nome.upper(), cep, modalidade, f"{peso} Kg", "-", "-", "-", float(valor)])
+        else:
+            ws.append([nome.upper(), cep, modalidade, 1.5, 20, 15, 10, float(valor)])
+    ws.append([f"=COUNTA(A2:A{len(bidders['nome']) + 1})"])
+    wb.save(output_file)
+
+def write_auction(directory, rows, number="00001", seed=0):
+    bidders = synthetic_bidders(rows, seed)
+    arrematantes_file = os.path.join(directory, f"Arrematantes_Leilao_{number}.xls")
+    cotacoes_file = os.path.join(directory, f"Cotações_Leilão_{number}.xlsx")
+    write_arrematantes(arrematantes_file, bidders)
+    write_cotacoes(cotacoes_file, bidders)
+    return arrematantes_file, cotacoes_file
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic auction export and filled Cotações file.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--directory", default=os.getcwd())
+    parser.add_argument("--number", default="00001", help="five-digit auction number")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for output_file in write_auction(args.directory, args.rows, args.number, args.seed):
+        print(f"File saved as {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_auction
+from watch import POLL_INTERVAL, SETTLE_TIME, FolderWatcher
+
+NUMBER = "00001"
+
+def wait_for_run(watcher, interval, timeout):
+    # Polls the way FolderWatcher.watch does until a run finishes
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        results = watcher.poll()
+        if results:
+            (stages, outcome), = results.values()
+            if not isinstance(outcome, float):
+                raise RuntimeError(outcome)
+            return time.perf_counter(), stages
+        time.sleep(interval)
+    raise TimeoutError(f"No run within {timeout}s")
+
+def drop(source, directory):
+    # Copy next to the target and rename, the way editors save
+    target = os.path.join(directory, os.path.basename(source))
+    shutil.copy(source, target + ".tmp")
+    os.replace(target + ".tmp", target)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure save-to-output turnaround of the folder watcher.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--settle", type=float, default=SETTLE_TIME)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'event':<12} {'stages':<20} {'turnaround (s)':>15}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source")
+            watched = os.path.join(tmp, "watched")
+            os.makedirs(source)
+            os.makedirs(watched)
+            arrematantes_file, cotacoes_file = write_auction(source, rows, NUMBER)
+            shutil.copy(os.path.join(ROOT, "valores.ini"), watched)
+            ficha = os.path.join(watched, f"Ficha_Leilão_{NUMBER}.xlsx")
+
+            watcher = FolderWatcher(watched, settle_time=args.settle)
+            for event, file in (("arrematantes", arrematantes_file), ("cotacoes", cotacoes_file), ("ficha", None)):
+                start = time.perf_counter()
+                if file:
+                    drop(file, watched)
+                else:
+                    # Staff saving the Ficha after typing a Situação
+                    os.utime(ficha)
+                end, stages = wait_for_run(watcher, args.interval, 60 + rows / 1000)
+                print(f"{rows:>9} {event:<12} {', '.join(stages):<20} {end - start:>15.2f}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import time
+import pandas as pd
+
+CACHE_DIR_NAME = ".excel_config_cache"
+CACHE_VERSION = 3
+MAX_CACHE_BYTES = 500 * 1024 * 1024
+MAX_CACHE_AGE = 30 * 24 * 60 * 60
+
+def _file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _hash(*parts):
+    key = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        key.update(str(part).encode("utf-8"))
+        key.update(b"\0")
+    return key.hexdigest()
+
+def cache_key(input_file, name):
+    # The entry prefix identifies the input; the suffix covers size, mtime
+    # and content so any change to the file invalidates the entry.
+    path = os.path.abspath(input_file)
+    stat = os.stat(path)
+    prefix = f"{name}-{_hash(CACHE_VERSION, path)}"
+    return prefix, _hash(stat.st_size, stat.st_mtime_ns, _file_digest(path))
+
+def cache_dir_for(input_file):
+    return os.path.join(os.path.dirname(os.path.abspath(input_file)), CACHE_DIR_NAME)
+
+def _remove(path):
+    # Batch workers share cache folders, so another process may have removed
+    # the entry already.
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def evict(cache_dir, max_bytes=MAX_CACHE_BYTES, max_age=MAX_CACHE_AGE):
+    if not os.path.isdir(cache_dir):
+        return
+    now = time.time()
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if not entry.is_file() or not entry.name.endswith(".pkl"):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        if now - stat.st_mtime > max_age:
+            _remove(entry.path)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+def cached_frame(input_file, name, loader, use_cache=True):
+    """Return loader(input_file), reusing a pickled result while the file is unchanged."""
+    if not use_cache:
+        return loader(input_file)
+    cache_dir = cache_dir_for(input_file)
+    prefix, key = cache_key(input_file, name)
+    cache_file = os.path.join(cache_dir, f"{prefix}-{key}.pkl")
+    if os.path.exists(cache_file):
+        try:
+            df = pd.read_pickle(cache_file)
+        except Exception:
+            _remove(cache_file)
+        else:
+            # Hits refresh the entry so eviction drops the least recently used.
+            try:
+                os.utime(cache_file)
+            except FileNotFoundError:
+                pass
+            return df
+    df = loader(input_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    for entry in os.scandir(cache_dir):
+        # An input has one live entry per loader; older versions are stale.
+        if entry.name.startswith(f"{prefix}-") and entry.name.endswith(".pkl"):
+            _remove(entry.path)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_file)
+    os.replace(tmp_file, cache_file)
+    evict(cache_dir)
+    return df
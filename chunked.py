@@ -0,0 +1,120 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from arrematantes import arrematantes_batches, numeric_cartelas, typed_arrematantes
+from instrumentation import span
+from matching import DUPLICATE, NO_BIDDER, NO_QUOTE, QuoteIndex, joined_rows, match_keys, report_rows
+from record import (
+    MODALIDADES, REPORT_SHEET_TITLE, price_rows, read_cotacoes,
+    write_ficha_header, write_ficha_rows, write_info_sheet, write_report_sheet
+)
+from summary import combine_groups, groups_summary, summary_groups
+from writer import new_workbook
+
+# Bidder rows per batch when the Ficha is built in chunks
+CHUNK_ROWS = 50_000
+
+REPORT_SOURCE_COLUMNS = ["Nome", "CEP", "Cartela"]
+
+# The chunked record reads the export twice. The first pass types each batch,
+# numbers repeated name/CEP pairs and spills the batch to disk; it also
+# learns the row count (where the footer goes), which keys repeat and whether
+# every Cartela is a number. The second pass joins, prices and writes one
+# batch at a time. Memory holds one batch, the typed quotes and one counter
+# per distinct name/CEP, never the whole Ficha.
+
+def spill_bidders(arrematantes_file, chunk_rows, spill_dir):
+    counts = {}
+    numeric = True
+    batch_files = []
+    for b_idx, batch in enumerate(arrematantes_batches(arrematantes_file, chunk_rows)):
+        batch = typed_arrematantes(batch, cartelas=False)
+        numeric = numeric and numeric_cartelas(batch['Cartela']) is not None
+        keys = match_keys(batch).to_numpy()
+        codes, uniques = pd.factorize(keys)
+        before = np.array([counts.get(key, 0) for key in uniques], dtype=np.int64)
+        occurrence = before[codes] + pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        for key, count in zip(uniques, np.bincount(codes, minlength=len(uniques))):
+            counts[key] = counts.get(key, 0) + int(count)
+        batch_file = os.path.join(spill_dir, f"{b_idx}.pkl")
+        pd.to_pickle((batch, keys, occurrence), batch_file)
+        batch_files.append(batch_file)
+    return batch_files, counts, numeric
+
+def record_batches(batch_files, counts, numeric, quotes, config):
+    # Priced Ficha rows of each spilled batch, with its bidders that have no
+    # quote and those whose name/CEP repeats.
+    for batch_file in batch_files:
+        batch, keys, occurrence = pd.read_pickle(batch_file)
+        os.remove(batch_file)
+        if numeric:
+            batch['Cartela'] = numeric_cartelas(batch['Cartela'])
+        named = batch['Nome'].notna().to_numpy()
+        rows = quotes.match(keys, np.where(named, occurrence, -1))
+        has_quote = rows >= 0
+        joined = joined_rows(batch, quotes.aligned(rows), has_quote)
+        codes, uniques = pd.factorize(keys)
+        repeated = (np.array([counts[key] for key in uniques], dtype=np.int64)[codes] > 1) & named
+        yield (
+            price_rows(joined, config),
+            batch.loc[named & ~has_quote, REPORT_SOURCE_COLUMNS],
+            batch.loc[repeated, REPORT_SOURCE_COLUMNS]
+        )
+
+def _rows(frames):
+    if not frames:
+        return pd.DataFrame(columns=REPORT_SOURCE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def write_record_chunked(output_file, arrematantes_file, cotacoes_file, config, summary_mode="formulas", chunk_rows=CHUNK_ROWS):
+    """Write the record workbook a batch of bidders at a time.
+
+    The result is the workbook process_record writes in streaming mode.
+    Returns the Conferência report.
+    """
+    with tempfile.TemporaryDirectory() as spill_dir:
+        with span("read", file=os.path.basename(arrematantes_file)) as measured:
+            batch_files, counts, numeric = spill_bidders(arrematantes_file, chunk_rows, spill_dir)
+            measured["rows"] = rows = sum(counts.values())
+        with span("read", file=os.path.basename(cotacoes_file)) as measured:
+            quotes = QuoteIndex(read_cotacoes(cotacoes_file, chunk_rows))
+            measured["rows"] = len(quotes.quotes)
+
+        summary_row = rows + 1
+        wb = new_workbook(streaming=True)
+        ws = wb.create_sheet(title="Ficha")
+        write_ficha_header(ws, summary_row)
+        groups = []
+        summary = None
+        no_quote = []
+        repeated = []
+        first_row = 2
+        with span("write-cells", rows=rows, sheet="Ficha"):
+            for new_df, unmatched, repeats in record_batches(batch_files, counts, numeric, quotes, config):
+                is_last = first_row + len(new_df) - 1 == summary_row
+                if summary_mode == "values":
+                    # The footer is in the last batch, so the totals are
+                    # complete just before it is written.
+                    groups.append(summary_groups(new_df.iloc[:-1] if is_last else new_df))
+                    if is_last:
+                        summary = groups_summary(combine_groups(groups), config.comissao, MODALIDADES)
+                write_ficha_rows(ws, new_df, first_row, summary_row, summary)
+                no_quote.append(unmatched)
+                repeated.append(repeats)
+                first_row += len(new_df)
+
+    no_quote = _rows(no_quote)
+    repeated = _rows(repeated)
+    unmatched_quotes = quotes.unmatched()
+    report = pd.concat([
+        report_rows(NO_QUOTE, no_quote["Nome"], no_quote["CEP"], no_quote["Cartela"]),
+        report_rows(NO_BIDDER, unmatched_quotes["Nome"], unmatched_quotes["CEP"], None),
+        report_rows(DUPLICATE, repeated["Nome"], repeated["CEP"], repeated["Cartela"])
+    ], ignore_index=True)
+    write_info_sheet(wb.create_sheet(title="Info"), summary_row, config.comissao, summary)
+    if len(report):
+        write_report_sheet(wb.create_sheet(title=REPORT_SHEET_TITLE), report)
+    with span("save", file=os.path.basename(output_file)):
+        wb.save(output_file)
+    return report
@@ -0,0 +1,98 @@
+import configparser
+import math
+import os
+from dataclasses import dataclass, field
+from model import percent_factor
+from pricing import surcharge_table
+
+# valores.ini keys of the IM rates, by the weight names rates.py uses
+IM_KEYS = {
+    "0.3Kg": "IM_0_3Kg",
+    "0.9Kg": "IM_0_9Kg",
+    "2.0Kg": "IM_2_0Kg"
+}
+
+# Parsed files by absolute path, with the (mtime, size) they were read at
+_loaded = {}
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """The values of valores.ini and the pricing tables derived from them.
+
+    Percentages and amounts are in the units valores.ini uses; the derived
+    factors and surcharges are in the integer units pricing.py works in.
+    The tables are stored as (key, value) pairs so a Config shared between
+    auctions cannot be changed by one of them; take dict() of them to look
+    values up.
+    """
+    comissao: float
+    seguro: float
+    pacote_extra: float
+    im_values: tuple
+    comissao_factor: int = field(init=False)
+    seguro_factor: int = field(init=False)
+    surcharges: tuple = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "im_values", tuple(dict(self.im_values).items()))
+        missing = set(IM_KEYS) - set(dict(self.im_values))
+        if missing:
+            raise ValueError(f"Missing IM rates: {', '.join(IM_KEYS[key] for key in sorted(missing))}")
+        for name, value in [
+            ("comissao", self.comissao), ("seguro", self.seguro), ("pacote_extra", self.pacote_extra)
+        ] + [(IM_KEYS.get(key, key), value) for key, value in self.im_values]:
+            _check_value(name, value)
+        object.__setattr__(self, "comissao_factor", percent_factor(self.comissao))
+        object.__setattr__(self, "seguro_factor", percent_factor(self.seguro))
+        object.__setattr__(self, "surcharges", tuple(surcharge_table(self.pacote_extra).items()))
+
+def _check_value(name, value):
+    # Money and percentages are converted to centavos and ten-thousandths
+    # exactly, which needs at most two decimals.
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"{name} must be a non-negative number, got {value}")
+    if abs(value * 100 - round(value * 100)) > 1e-6:
+        raise ValueError(f"{name} must have at most two decimals, got {value}")
+
+def _number(config, section, key):
+    if not config.has_option(section, key):
+        raise ValueError(f"Missing '{key}' in section [{section}]")
+    text = config[section][key]
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"[{section}] {key} = '{text}' is not a number") from None
+
+def read_config(config_file):
+    config = configparser.ConfigParser()
+    try:
+        if not config.read(config_file, encoding="utf-8-sig"):
+            raise FileNotFoundError(f"Configuration file '{config_file}' not found.")
+    except configparser.Error as e:
+        raise ValueError(f"Invalid configuration in '{config_file}': {e}") from None
+    try:
+        return Config(
+            comissao=_number(config, "Comissao", "comissao"),
+            seguro=_number(config, "Seguro", "seguro"),
+            pacote_extra=_number(config, "Pacote_Extra", "pacote_extra"),
+            im_values={key: _number(config, "IM_Weights", name) for key, name in IM_KEYS.items()}
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid configuration in '{config_file}': {e}") from None
+
+def load_config(config_file):
+    """Return the Config of config_file, parsing it only when it changed.
+
+    Batch workers and the folder watcher call this for every auction; the
+    file is read again only after its modification time or size changes.
+    """
+    path = os.path.abspath(config_file)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Configuration file '{config_file}' not found.") from None
+    state = (stat.st_mtime_ns, stat.st_size)
+    loaded = _loaded.get(path)
+    if loaded is None or loaded[0] != state:
+        loaded = _loaded[path] = (state, read_config(path))
+    return loaded[1]
@@ -0,0 +1,142 @@
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Tracing is off unless a trace file is given, with --trace or through the
+# environment (which also reaches batch worker processes). "-" traces to
+# stderr. Each span is one JSON line: its path ("record/read"), elapsed
+# seconds, row count when known and the change in resident memory.
+TRACE_ENV = "EXCEL_CONFIG_TRACE"
+PROFILE_ENV = "EXCEL_CONFIG_PROFILE"
+PROFILERS = ["cprofile", "tracemalloc"]
+TOP_ALLOCATIONS = 10
+
+_stack = []
+
+def configure(trace_file=None, profile=None):
+    if profile and profile not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profile}', expected one of: {', '.join(PROFILERS)}")
+    if trace_file:
+        os.environ[TRACE_ENV] = trace_file
+    if profile:
+        if not tracing():
+            raise ValueError("Profiling needs a trace file, set with --trace or EXCEL_CONFIG_TRACE")
+        os.environ[PROFILE_ENV] = profile
+
+def trace_file():
+    return os.environ.get(TRACE_ENV) or None
+
+def tracing():
+    return trace_file() is not None
+
+def _write(record):
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    target = trace_file()
+    if target == "-":
+        sys.stderr.write(line)
+        return
+    # One append per line keeps records from batch workers whole.
+    with open(target, "a", encoding="utf-8") as f:
+        f.write(line)
+
+def _rss():
+    # Resident memory in bytes, or None where it cannot be read cheaply.
+    if sys.platform == "win32":
+        return _windows_rss()
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def _windows_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t)
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+def _profile_file(path):
+    target = trace_file()
+    base = "trace" if target == "-" else os.path.splitext(target)[0]
+    return f"{base}-{path.replace('/', '-')}-{os.getpid()}.prof"
+
+@contextmanager
+def span(name, rows=None, profile=False, **fields):
+    """Time the enclosed block when tracing is on.
+
+    Yields a dict for fields only known at the end, such as rows. With
+    profile=True the block also runs under the profiler chosen in
+    EXCEL_CONFIG_PROFILE; spans inside a profiled one are not profiled again.
+    """
+    record = {"rows": rows, **fields}
+    if not tracing():
+        yield record
+        return
+    _stack.append(name)
+    path = "/".join(_stack)
+    profiler = os.environ.get(PROFILE_ENV) if profile and len(_stack) == 1 else None
+    profile_run = None
+    if profiler == "cprofile":
+        profile_run = cProfile.Profile()
+        profile_run.enable()
+    elif profiler == "tracemalloc" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    else:
+        profiler = None
+    rss = _rss()
+    traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - start
+        end_rss = _rss()
+        _stack.pop()
+        entry = {"span": path, "pid": os.getpid(), "elapsed": round(elapsed, 6)}
+        entry.update((key, value) for key, value in record.items() if value is not None)
+        if rss is not None and end_rss is not None:
+            entry["rss"] = end_rss
+            entry["rss_delta"] = end_rss - rss
+        if traced is not None and tracemalloc.is_tracing():
+            entry["traced_delta"] = tracemalloc.get_traced_memory()[0] - traced
+        if profile_run is not None:
+            profile_run.disable()
+            entry["profile"] = _profile_file(path)
+            profile_run.dump_stats(entry["profile"])
+        elif profiler == "tracemalloc":
+            snapshot = tracemalloc.take_snapshot()
+            entry["traced_peak"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            entry["top_allocations"] = [str(stat) for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]]
+        _write(entry)
+
+def event(name, **fields):
+    # A one-off record, such as the dtypes of a parsed frame.
+    if tracing():
+        _write({"event": "/".join(_stack + [name]), "pid": os.getpid(), **fields})
+
+def frame_fields(df):
+    return {"rows": len(df), "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()}}
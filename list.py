@@ -1,56 +1,91 @@
 import os
+import sys
 import openpyxl
-import re
+from auction_files import list_directory, find_ficha, file_number
+from instrumentation import span
+from model import display_frame
+from writer import saved_value
 
 # Define a constant for the separator
 SEPARATOR = "##############################"
 
-def generate_list():
-    # Automatically find the input file matching the pattern "Ficha_Leilão_#####.xlsx"
-    input_pattern = re.compile(r"Ficha_Leilão_\d{5}\.xlsx")
-    input_file = None
-
-    for file in os.listdir():
-        if input_pattern.match(file):
-            input_file = file
-            break
-
-    if not input_file:
-        print("No matching input file found.")
-        return
-
-    # Extract the number from the input filename
-    file_number = input_file.split('_')[-1].split('.')[0]
-    output_file = f"Lista_Leilão_{file_number}.txt"
-
-    # Load the workbook and select the active sheet
-    wb = openpyxl.load_workbook(input_file)
-    sheet = wb.active
-
-    # Open the output file for writing
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # Iterate over the rows, skipping the header (assume header is in the first row)
-        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row - 1):
-            col_a = row[0].value
-            col_e = row[4].value
-            col_f = row[5].value
-            col_g = row[6].value
-            col_h = row[7].value
-
-            # Get the formatted values for F, G, and H
-            col_f_formatted = f'{col_f:,.2f}' if isinstance(col_f, (int, float)) else col_f
-            col_g_formatted = f'{col_g:,.2f}' if isinstance(col_g, (int, float)) else col_g
-            col_h_formatted = f'{col_h:,.2f}' if isinstance(col_h, (int, float)) else col_h
-
-            # Write the formatted text to the output file
-            f.write(f"{SEPARATOR}\n\n")
-            f.write(f"{col_a}\n")
-            f.write("-----\n")
-            f.write(f"O valor da sua arrematação é: R$ {col_g_formatted}\n")
-            f.write(f"O valor do frete por {col_e} é: R$ {col_f_formatted}\n")
-            f.write(f"O total a pagar é: R$ {col_h_formatted}\n\n")
-
-    print(f"List generated successfully: {output_file}")
-
-# Example usage
-generate_list()
+# Shown in messages for cells left empty on the Ficha, such as the Modalidade
+# and shipping of a bidder without a quote
+MISSING = "-"
+
+MESSAGE_TEMPLATE = (
+    "{separator}\n\n"
+    "{nome}\n"
+    "-----\n"
+    "O valor da sua arrematação é: R$ {arrematacao}\n"
+    "O valor do frete por {modalidade} é: R$ {envio}\n"
+    "O total a pagar é: R$ {total}\n\n"
+)
+
+# A single bidder's message, for the per-bidder files and the exports
+BIDDER_TEMPLATE = MESSAGE_TEMPLATE.replace("{separator}\n\n", "", 1)
+
+# Number of bidder rows handed to the list outputs at a time
+CHUNK_SIZE = 1000
+
+def ficha_rows(input_file):
+    # Read-only, values-only iteration keeps memory constant, and data_only
+    # returns the values Excel cached for formula cells instead of formulas.
+    wb = openpyxl.load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        sheet = wb.active
+        rows = sheet.iter_rows(min_row=2, max_col=8, values_only=True)
+        # Hold each row back by one so the footer (last row) is skipped.
+        previous = next(rows, None)
+        for row in rows:
+            values = tuple(previous) + (None,) * (8 - len(previous))
+            yield values[0], values[4], values[5], values[6], values[7]
+            previous = row
+    finally:
+        wb.close()
+
+def record_rows(new_df):
+    # Same values ficha_rows would read back from the Ficha written for
+    # new_df: the footer row is left out and bidders with a quote but no
+    # shipping show "-".
+    for row in display_frame(new_df.iloc[:-1]).itertuples(index=False):
+        nome, modalidade, valor_env, arrematacao, total = (saved_value(row[i]) for i in (0, 4, 5, 6, 7))
+        if valor_env is None and modalidade is not None:
+            valor_env = "-"
+        yield nome, modalidade, valor_env, arrematacao, total
+
+def format_text(value):
+    return MISSING if value is None else value
+
+def format_money(value):
+    return f'{value:,.2f}' if isinstance(value, (int, float)) else format_text(value)
+
+def generate_list(directory=None, files=None, rows=None, number=None, formats=None, list_template=None, message_template=None):
+    from sinks import archive, fan_out, list_sinks
+    current_directory = directory or os.getcwd()
+    formats = formats or ["text"]
+
+    if rows is None:
+        # Automatically find the input file matching the pattern "Ficha_Leilão_#####.xlsx"
+        input_file = find_ficha(list_directory(current_directory) if files is None else files)
+        if not input_file:
+            print("No matching input file found.")
+            return
+        number = file_number(input_file)
+        rows = ficha_rows(os.path.join(current_directory, input_file))
+
+    # The Ficha is read once and every format is written from that one pass.
+    sinks = list_sinks(current_directory, number, formats, list_template, message_template)
+    outputs = [output for sink in sinks for output in sink.outputs]
+    # Rows are read lazily, so reading the Ficha is part of this span.
+    with span("write", file=os.path.basename(outputs[0]), formats=formats) as measured:
+        measured["rows"] = fan_out(rows, sinks)
+    if "zip" in formats:
+        with span("archive"):
+            outputs.append(archive(os.path.join(current_directory, f"Lista_Leilão_{number}.zip"), outputs))
+    print(f"List generated successfully: {', '.join(os.path.basename(output) for output in outputs)}")
+    return outputs[0]
+
+if __name__ == "__main__":
+    from pipeline import main
+    main(["list"] + sys.argv[1:])
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+from model import CEP_DTYPE, cep_text
+
+REPORT_COLUMNS = ["Situação", "Nome", "CEP", "Cartela"]
+NO_QUOTE = "Sem cotação"
+NO_BIDDER = "Cotação sem arrematante"
+DUPLICATE = "Nome e CEP repetidos"
+
+def _per_unique(values, normalize):
+    # Names and CEPs repeat across lots, so each distinct value is cleaned once
+    codes, uniques = pd.factorize(values.astype(object))
+    normalized = normalize(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    return pd.Series(np.append(normalized, "")[codes], index=values.index, dtype=object)
+
+def name_key(names):
+    return _per_unique(names, _normalize_names)
+
+def cep_key(ceps):
+    return _per_unique(ceps, _normalize_ceps)
+
+def _normalize_names(names):
+    # Upper case, no accents and single spaces, so "José  da Silva" in the
+    # export matches "JOSE DA SILVA" typed in the Cotações.
+    return (
+        names.astype("string")
+        .fillna("")
+        .str.normalize("NFKD")
+        .str.replace(r"[\u0300-\u036f]", "", regex=True)
+        .str.upper()
+        .str.split()
+        .str.join(" ")
+    )
+
+def _normalize_ceps(ceps):
+    return ceps.astype("string").fillna("").str.replace(r"\D", "", regex=True).str.zfill(8)
+
+def match_keys(df):
+    return name_key(df["Nome"]) + "|" + cep_key(df["CEP"])
+
+def join_quotes(arrematantes_df, cotacoes_df):
+    """Match each bidder to its quote by name and CEP.
+
+    Returns the joined rows in export order and a report of bidders without
+    a quote, quotes without a bidder and repeated name/CEP pairs.
+    """
+    left_key = match_keys(arrematantes_df).to_numpy()
+    right_key = match_keys(cotacoes_df).to_numpy()
+    # Shared categories let the hash join work on integer codes
+    categories = pd.unique(np.concatenate([left_key, right_key]))
+    left = pd.DataFrame({"key": pd.Categorical(left_key, categories=categories)})
+    right = cotacoes_df[["Nome", "CEP", "Modalidade", "Valor"]].reset_index(drop=True)
+    right["key"] = pd.Categorical(right_key, categories=categories)
+    right["quote_row"] = np.arange(len(right))
+    # Repeated name/CEP pairs are matched in order of appearance; rows
+    # without a name (the export's totals line) never match.
+    named = arrematantes_df["Nome"].notna().to_numpy()
+    left["occurrence"] = np.where(named, left.groupby("key", observed=True).cumcount(), -1)
+    right["occurrence"] = right.groupby("key", observed=True).cumcount()
+    aligned = left.merge(right, on=["key", "occurrence"], how="left", sort=False)
+    has_quote = aligned["quote_row"].notna().to_numpy()
+
+    joined = joined_rows(arrematantes_df, aligned, has_quote)
+
+    matched_quotes = np.zeros(len(right), dtype=bool)
+    matched_quotes[aligned["quote_row"].dropna().astype(int).to_numpy()] = True
+    unmatched_bidders = arrematantes_df[named & ~has_quote]
+    unmatched_quotes = cotacoes_df[~matched_quotes]
+    duplicated = pd.Series(left_key).duplicated(keep=False).to_numpy() & named
+    repeated = arrematantes_df[duplicated]
+    report = pd.concat([
+        report_rows(NO_QUOTE, unmatched_bidders["Nome"], unmatched_bidders["CEP"], unmatched_bidders["Cartela"]),
+        report_rows(NO_BIDDER, unmatched_quotes["Nome"], unmatched_quotes["CEP"], None),
+        report_rows(DUPLICATE, repeated["Nome"], repeated["CEP"], repeated["Cartela"])
+    ], ignore_index=True)
+    return joined, report
+
+def joined_rows(arrematantes_df, aligned, has_quote):
+    # Bidder rows with the Nome, CEP, Modalidade and Valor of their quote;
+    # aligned holds each row's quote, or missing values where has_quote is
+    # False.
+    return pd.DataFrame({
+        "Nome": np.where(has_quote, aligned["Nome"].to_numpy(dtype=object), arrematantes_df["Nome"].str.upper().to_numpy(dtype=object)),
+        "Cartela": arrematantes_df["Cartela"].array,
+        "CEP": aligned["CEP"].astype(CEP_DTYPE).where(has_quote, arrematantes_df["CEP"].array).array,
+        "UF": arrematantes_df["UF"].array,
+        "Modalidade": aligned["Modalidade"].array,
+        "Valor": aligned["Valor"].array,
+        "Arrematação": arrematantes_df["Arrematação"].array
+    })
+
+def report_rows(situacao, nomes, ceps, cartelas):
+    return pd.DataFrame({
+        "Situação": situacao,
+        "Nome": nomes.to_numpy(dtype=object),
+        "CEP": cep_text(ceps).to_numpy(),
+        "Cartela": cartelas.to_numpy(dtype=object, na_value=None) if cartelas is not None else None
+    }, columns=REPORT_COLUMNS)
+
+class QuoteIndex:
+    # The quotes of a Cotações file by name/CEP key, for matching bidders a
+    # batch at a time: the n-th bidder with a key (counting every row, as
+    # join_quotes does) gets the n-th quote with it.
+    def __init__(self, cotacoes_df):
+        self.quotes = cotacoes_df[["Nome", "CEP", "Modalidade", "Valor"]].reset_index(drop=True)
+        codes, keys = pd.factorize(match_keys(self.quotes).to_numpy())
+        self.keys = pd.Index(keys)
+        self.counts = np.bincount(codes, minlength=len(keys))
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.order = np.argsort(codes, kind="stable")
+        self.matched = np.zeros(len(self.quotes), dtype=bool)
+
+    def match(self, keys, occurrence):
+        # Quote row for each bidder, or -1; occurrence is -1 for rows that
+        # must not match.
+        rows = np.full(len(keys), -1)
+        if not len(self.keys):
+            return rows
+        codes = self.keys.get_indexer(keys)
+        found = (codes >= 0) & (occurrence >= 0)
+        found[found] = occurrence[found] < self.counts[codes[found]]
+        rows[found] = self.order[self.starts[codes[found]] + occurrence[found]]
+        self.matched[rows[found]] = True
+        return rows
+
+    def aligned(self, rows):
+        # The quote of each bidder row, missing values where rows is -1
+        return self.quotes.reindex(rows).reset_index(drop=True)
+
+    def unmatched(self):
+        return self.quotes[~self.matched]
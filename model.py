@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+# Auction rows are kept in compact types between reading and writing: CEPs as
+# integers, UF and Modalidade as categoricals and money as int64 centavos, so
+# sums are exact and rounding happens once per amount. Zero-padded CEPs and
+# R$ values are produced only when a sheet or the list is written.
+CEP_DTYPE = "UInt32"
+MONEY_DTYPE = "Int64"
+CARTELA_DTYPE = "UInt32"
+
+MONEY_COLUMNS = ["Valor", "Valor Env.", "Arrematação", "Total"]
+
+def cep_number(values):
+    # "01234-567", "1234567" or 1234567 -> 1234567; no digits -> NA
+    digits = values.astype("string").str.replace(r"\D", "", regex=True)
+    return pd.to_numeric(digits.mask(digits == "")).astype(CEP_DTYPE)
+
+def objects(values):
+    # An object Series with None for missing values. Built from plain arrays,
+    # pandas would infer a string dtype whenever a string is present and turn
+    # None into NaN, so a cell's output would depend on its neighbours.
+    return pd.Series(values.to_numpy(dtype=object, na_value=None), index=values.index, dtype=object)
+
+def cep_text(values):
+    return objects(values.astype("string").str.zfill(8))
+
+def centavos(values):
+    # Amounts typed or exported with at most two decimals convert exactly.
+    reais = pd.to_numeric(values, errors="coerce").astype("float64")
+    return pd.Series(np.round(reais * 100), index=reais.index).astype(MONEY_DTYPE)
+
+def reais(values):
+    return values.astype("Float64").to_numpy(dtype="float64", na_value=np.nan) / 100
+
+def percent_factor(percent):
+    # 1 + percent/100 in ten-thousandths, exact since percentages in
+    # valores.ini have at most two decimals.
+    return int(round((100 + percent) * 100))
+
+def apply_factor(values, factor):
+    # values * factor / 10000, rounded half up to the centavo in integer
+    # arithmetic.
+    return (values * factor + 5000) // 10000
+
+def categorical(values):
+    return values.astype("category")
+
+def display_frame(df):
+    # The typed columns as they are written out: zero-padded CEPs, R$ amounts
+    # as floats and empty cells for missing values.
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column == "CEP":
+            columns[column] = cep_text(values)
+        elif column in MONEY_COLUMNS:
+            columns[column] = reais(values)
+        elif values.dtype == object or isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            columns[column] = objects(values)
+        elif isinstance(values.dtype, pd.api.extensions.ExtensionDtype) and values.dtype.kind in "iu":
+            # Nullable integers such as Cartela, without turning into floats
+            columns[column] = objects(values)
+        else:
+            columns[column] = values.to_numpy()
+    return pd.DataFrame(columns, index=df.index)
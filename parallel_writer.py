@@ -0,0 +1,147 @@
+import math
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import span
+from styles import STYLE_SPECS
+from writer import new_workbook, styled_cell
+
+# Parts smaller than this are not worth a process of their own
+MIN_PART_ROWS = 10_000
+
+SHEET_DATA_START = b"<sheetData>"
+SHEET_DATA_END = b"</sheetData>"
+
+class ParallelWriteError(Exception):
+    pass
+
+# A workbook is described as a list of (title, parts), and each part as
+# (first_row, steps), where first_row is the sheet row the part starts at and
+# steps are (write, args) calls made on the worksheet in order. The first part
+# of a sheet sets it up (widths, freeze panes, validations); later parts only
+# append rows.
+
+def part_size(rows, workers):
+    if not workers or workers < 2:
+        return max(rows, 1)
+    return max(MIN_PART_ROWS, math.ceil(rows / workers))
+
+def save_workbook(output_file, sheets, streaming=False, workers=None):
+    if workers and workers > 1 and sum(len(parts) for _, parts in sheets) > 1:
+        try:
+            _save_parallel(output_file, sheets, workers)
+            return
+        except Exception as e:
+            print(f"Parallel write failed ({type(e).__name__}: {e}), writing {os.path.basename(output_file)} serially")
+    _save_serial(output_file, sheets, streaming)
+
+def _save_serial(output_file, sheets, streaming):
+    wb = new_workbook(streaming)
+    for title, parts in sheets:
+        with span("write-cells", sheet=title):
+            ws = wb.create_sheet(title=title)
+            for _, steps in parts:
+                for write, args in steps:
+                    write(ws, *args)
+    with span("save", file=os.path.basename(output_file)):
+        wb.save(output_file)
+
+def register_cell_styles(ws):
+    # Cell style ids are handed out on first use. Adding every named style
+    # up front, in registry order, gives the same ids in every process.
+    for name in STYLE_SPECS:
+        styled_cell(ws, None, name).style_id
+
+def _write_part(title, first_row, steps, part_file):
+    wb = new_workbook(streaming=True)
+    ws = wb.create_sheet(title=title)
+    register_cell_styles(ws)
+    # Write-only sheets number rows from 1; the empty placeholder rows are
+    # cut off when the parts are stitched together.
+    for _ in range(first_row - 1):
+        ws.append(())
+    for write, args in steps:
+        write(ws, *args)
+    wb.save(part_file)
+    return ws.sheet_state
+
+def _sheet_xml(part_file):
+    with zipfile.ZipFile(part_file) as zf:
+        return zf.read("xl/worksheets/sheet1.xml"), zf.read("xl/styles.xml")
+
+def _split(xml, first_row):
+    start = xml.find(SHEET_DATA_START)
+    end = xml.rfind(SHEET_DATA_END)
+    if start < 0 or end < 0:
+        raise ParallelWriteError("worksheet part has no <sheetData>")
+    start += len(SHEET_DATA_START)
+    rows_start = start
+    if first_row > 1:
+        rows_start = xml.find(b'<row r="%d"' % first_row, start, end)
+        if rows_start < 0:
+            rows_start = end
+    return xml[:start], xml[rows_start:end], xml[end:]
+
+def _save_parallel(output_file, sheets, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        part_files = [
+            [(first_row, os.path.join(tmp, f"{s_idx}-{p_idx}.xlsx")) for p_idx, (first_row, _) in enumerate(parts)]
+            for s_idx, (_, parts) in enumerate(sheets)
+        ]
+        with span("write-cells", parts=sum(len(files) for files in part_files), workers=workers), ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                [
+                    executor.submit(_write_part, title, first_row, steps, part_file)
+                    for (first_row, steps), (_, part_file) in zip(parts, files)
+                ]
+                for (title, parts), files in zip(sheets, part_files)
+            ]
+            states = [[future.result() for future in sheet_futures][0] for sheet_futures in futures]
+
+        with span("save", file=os.path.basename(output_file)):
+            # The skeleton provides workbook.xml, relationships and content types
+            # for the sheets, with the same styles table every part was built on.
+            skeleton_file = os.path.join(tmp, "skeleton.xlsx")
+            wb = new_workbook(streaming=True)
+            for (title, _), state in zip(sheets, states):
+                ws = wb.create_sheet(title=title)
+                ws.sheet_state = state
+                register_cell_styles(ws)
+            wb.save(skeleton_file)
+
+            directory = os.path.dirname(os.path.abspath(output_file))
+            fd, stitched_file = tempfile.mkstemp(prefix=".", suffix=".xlsx", dir=directory)
+            os.close(fd)
+            try:
+                _stitch(skeleton_file, part_files, stitched_file)
+                os.replace(stitched_file, output_file)
+            except BaseException:
+                os.remove(stitched_file)
+                raise
+
+def _stitch(skeleton_file, part_files, output_file):
+    with zipfile.ZipFile(skeleton_file) as skeleton, zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as out:
+        styles = skeleton.read("xl/styles.xml")
+        for info in skeleton.infolist():
+            name = info.filename
+            if not (name.startswith("xl/worksheets/sheet") and name.endswith(".xml")):
+                out.writestr(info, skeleton.read(name))
+                continue
+            # Only the first part of a sheet may configure it; the others
+            # must look like the skeleton's bare sheet around their rows.
+            bare_head, _, bare_tail = _split(skeleton.read(name), 1)
+            parts = part_files[int(name[len("xl/worksheets/sheet"):-len(".xml")]) - 1]
+            with out.open(name, "w") as dst:
+                for p_idx, (first_row, part_file) in enumerate(parts):
+                    xml, part_styles = _sheet_xml(part_file)
+                    if part_styles != styles:
+                        raise ParallelWriteError(f"part {p_idx} of {name} added cell styles")
+                    head, rows, tail = _split(xml, first_row)
+                    if p_idx == 0:
+                        dst.write(head)
+                        sheet_tail = tail
+                    elif (head, tail) != (bare_head, bare_tail):
+                        raise ParallelWriteError(f"part {p_idx} of {name} changed sheet settings")
+                    dst.write(rows)
+                dst.write(sheet_tail)
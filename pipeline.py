@@ -0,0 +1,154 @@
+import argparse
+import os
+import time
+from auction_files import list_directory, find_arrematantes, file_number, config_path
+from instrumentation import PROFILERS, TRACE_ENV, configure, span
+
+STAGES = ["quotes", "record", "list"]
+SUMMARY_MODES = ["formulas", "values"]
+# Same as sinks.FORMATS, kept here so parsing arguments does not import the stages
+LIST_FORMATS = ["text", "messages", "csv", "json", "zip"]
+
+class PipelineContext:
+    # State shared between stages of a single run: the directory listing is
+    # taken once and parsed frames are handed over in memory.
+    def __init__(self, directory=None, streaming=False, use_cache=True, files=None, config_file=None, update=False, summary_mode="formulas", workers=None, chunk_size=None, list_formats=None, list_template=None, message_template=None, config=None):
+        self.directory = directory or os.getcwd()
+        self.streaming = streaming
+        self.use_cache = use_cache
+        self.files = list_directory(self.directory) if files is None else list(files)
+        self.config_file = config_file
+        self.update = update
+        self.summary_mode = summary_mode
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.list_formats = list_formats
+        self.list_template = list_template
+        self.message_template = message_template
+        self.config = config
+        self.arrematantes_df = None
+        self.ficha_df = None
+
+    def path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def arrematantes(self):
+        if self.arrematantes_df is None:
+            arrematantes_file = find_arrematantes(self.files)
+            if arrematantes_file:
+                from arrematantes import read_arrematantes
+                from cache import cached_frame
+                self.arrematantes_df = cached_frame(
+                    self.path(arrematantes_file), "arrematantes", read_arrematantes, self.use_cache
+                )
+        return self.arrematantes_df
+
+    def load_config(self):
+        if self.config is None:
+            from config import load_config
+            self.config = load_config(self.config_file or config_path(self.directory))
+        return self.config
+
+    def refresh_files(self, output_file):
+        name = os.path.basename(output_file)
+        if name not in self.files:
+            self.files.append(name)
+
+def run_quotes(context):
+    from quotes import process_quotes
+    output_file = process_quotes(
+        streaming=context.streaming, use_cache=context.use_cache, directory=context.directory,
+        files=context.files, arrematantes_df=context.arrematantes(), config=context.load_config()
+    )
+    context.refresh_files(output_file)
+
+def run_record(context):
+    from record import process_record
+    # Chunked runs read the export in batches instead of all at once.
+    arrematantes_df = None if context.chunk_size else context.arrematantes()
+    context.ficha_df = process_record(
+        streaming=context.streaming, use_cache=context.use_cache, directory=context.directory,
+        files=context.files, arrematantes_df=arrematantes_df, update=context.update,
+        summary_mode=context.summary_mode, workers=context.workers, chunk_size=context.chunk_size,
+        config=context.load_config()
+    )
+    if context.ficha_df is None:
+        context.refresh_files(f"Ficha_Leilão_{file_number(find_arrematantes(context.files))}.xlsx")
+
+def run_list(context):
+    from list import generate_list, record_rows
+    options = dict(
+        formats=context.list_formats, list_template=context.list_template,
+        message_template=context.message_template
+    )
+    if context.ficha_df is not None:
+        # The Ficha was built in this run, so skip reading it back from disk.
+        number = file_number(find_arrematantes(context.files))
+        generate_list(directory=context.directory, rows=record_rows(context.ficha_df), number=number, **options)
+    else:
+        generate_list(directory=context.directory, files=context.files, **options)
+
+STAGE_RUNNERS = {
+    "quotes": run_quotes,
+    "record": run_record,
+    "list": run_list
+}
+
+def run_pipeline(stages, directory=None, streaming=False, use_cache=True, files=None, config_file=None, update=False, summary_mode="formulas", workers=None, chunk_size=None, list_formats=None, list_template=None, message_template=None, config=None):
+    context = PipelineContext(
+        directory, streaming, use_cache, files, config_file, update, summary_mode, workers, chunk_size,
+        list_formats, list_template, message_template, config
+    )
+    timings = {}
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        start = time.perf_counter()
+        with span(stage, profile=True, directory=context.directory):
+            STAGE_RUNNERS[stage](context)
+        timings[stage] = time.perf_counter() - start
+        print(f"[{stage}] {timings[stage]:.2f}s")
+    return timings
+
+def add_trace_arguments(parser):
+    parser.add_argument("--trace", metavar="FILE", help=f"append timing spans as JSON lines to FILE, or '-' for stderr (also set by {TRACE_ENV})")
+    parser.add_argument("--profile", choices=PROFILERS, help="also run each stage under cProfile or tracemalloc (needs --trace)")
+
+def apply_trace_arguments(parser, args):
+    # A profile without anywhere to write it is a usage error, reported
+    # like any other bad option instead of as a traceback.
+    if args.profile and not (args.trace or os.environ.get(TRACE_ENV)):
+        parser.error(f"--profile needs --trace FILE or {TRACE_ENV}")
+    configure(args.trace, args.profile)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the auction stages in a single process.")
+    parser.add_argument("stages", nargs="+", choices=STAGES, help="stages to run, always executed in pipeline order")
+    parser.add_argument("--directory", help="folder with the auction files (defaults to the current directory)")
+    parser.add_argument("--streaming", action="store_true", help="write the workbooks in write-only mode")
+    parser.add_argument("--no-cache", action="store_true", help="parse the input files again instead of using the cache")
+    parser.add_argument("--update", action="store_true", help="update an existing Ficha in place, keeping Situação and Observação")
+    parser.add_argument("--summary", choices=SUMMARY_MODES, default="formulas", help="Ficha footer and Info totals as formulas or precomputed values")
+    parser.add_argument("--workers", type=int, default=None, help="write the Ficha with this many processes (serial by default)")
+    parser.add_argument("--chunk-size", type=int, default=None, metavar="ROWS", help="build the Ficha in batches of ROWS bidders to bound memory on very large auctions")
+    parser.add_argument("--list-formats", nargs="+", choices=LIST_FORMATS, default=["text"], help="list outputs, all written from one pass over the Ficha ('zip' packs the others)")
+    parser.add_argument("--list-template", metavar="FILE", help="message template for the text list, with {separator}, {nome}, {modalidade}, {envio}, {arrematacao} and {total}")
+    parser.add_argument("--message-template", metavar="FILE", help="message template for the per-bidder files and the CSV and JSON exports")
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    apply_trace_arguments(parser, args)
+    list_template = message_template = None
+    if args.list_template or args.message_template:
+        # Checked before any stage runs, so a typo does not cost a full record
+        from sinks import load_template
+        list_template = args.list_template and load_template(args.list_template)
+        message_template = args.message_template and load_template(args.message_template)
+    run_pipeline(
+        args.stages, args.directory, args.streaming, not args.no_cache,
+        update=args.update, summary_mode=args.summary, workers=args.workers,
+        chunk_size=args.chunk_size, list_formats=args.list_formats, list_template=list_template,
+        message_template=message_template
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from model import apply_factor
+
+PACOTE_EXTRA_MODALIDADES = ["PAC", "PAC Min."]
+DOUBLE_PACOTE_EXTRA_MODALIDADES = ["2x PAC"]
+NO_SHIPPING_MODALIDADES = ["RETIRA"]
+
+def surcharge_table(pacote_extra):
+    # Centavos added to the quote of each Modalidade before insurance
+    extra = int(round(pacote_extra * 100))
+    table = {modalidade: extra for modalidade in PACOTE_EXTRA_MODALIDADES}
+    table.update((modalidade, 2 * extra) for modalidade in DOUBLE_PACOTE_EXTRA_MODALIDADES)
+    return table
+
+def shipping_cost(modalidade, valor, surcharges, seguro_factor):
+    # All amounts are centavos. NA marks rows without shipping (RETIRA or no
+    # quote); the writer turns it into the "-" shown on the Ficha. The
+    # surcharge is looked up once per distinct Modalidade, not per row.
+    table = dict(surcharges)
+    codes, uniques = pd.factorize(modalidade)
+    surcharge = np.array([table.get(value, 0) for value in uniques] + [0], dtype=np.int64)[codes]
+    envio = apply_factor(valor + surcharge, seguro_factor)
+    return envio.mask(modalidade.isin(NO_SHIPPING_MODALIDADES).to_numpy())
+
+def with_commission(arrematacao, comissao_factor):
+    return apply_factor(arrematacao, comissao_factor)
+
+def total_due(arrematacao, valor_env):
+    # Without shipping (RETIRA or no quote) the bidder owes the Arrematação.
+    # The export's totals line gets a total too, but the Ficha footer
+    # replaces it.
+    return arrematacao + valor_env.fillna(0)
@@ -1,162 +1,111 @@
-import configparser
 import pandas as pd
 import os
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl import Workbook
-from openpyxl.worksheet.datavalidation import DataValidation
-from openpyxl.styles import Alignment
-from styles import (
-    FONT_ARIAL_12, BOLD_FONT, HEADER_FILL, FOOTER_FILL,
-    LIGHT_GRAY_FILL, WHITE_FILL, HEADER_BORDER, FOOTER_BORDER, VERTICAL_BORDER
-)
+import sys
+from styles import body_style
+from arrematantes import read_arrematantes
+from cache import cached_frame
+from config import load_config
+from instrumentation import span
+from model import cep_text
+from auction_files import list_directory, find_arrematantes, file_number, config_path
+from rates import RATE_SHEET_TITLE, write_rate_sheet, lookup_formulas
+from writer import new_workbook, styled_cell, add_list_validation, set_column_widths
 
-def process_quotes():
-    current_directory = os.getcwd()
+MODALIDADE_OPTIONS = ["RETIRA", "IM", "PAC Min.", "PAC", "2x PAC", "SEDEX", "OUTRO"]
 
-    input_file = next((file for file in os.listdir(current_directory) if file.startswith("Arrematantes_Leilao_") and file.endswith(".xls")), None)
-    if not input_file:
-        raise FileNotFoundError("No input file matching 'Arrematantes_Leilao_#####.xls' found in the current directory.")
-    input_file = os.path.join(current_directory, input_file)
-    config_file = os.path.join(current_directory, "valores.ini")
-    if not os.path.exists(config_file):
-        raise FileNotFoundError("Configuration file 'valores.ini' not found in the current directory.")
-    file_number = os.path.splitext(os.path.basename(input_file))[0].split('_')[-1]
-    output_file = f"Cotações_Leilão_{file_number}.xlsx"
-    config = configparser.ConfigParser()
-    config.read(config_file)
-    
-    im_values = {
-        '0.3Kg': float(config['IM_Weights']['IM_0_3Kg']),
-        '0.9Kg': float(config['IM_Weights']['IM_0_9Kg']),
-        '2.0Kg': float(config['IM_Weights']['IM_2_0Kg'])
-    }
-    
-    df = pd.read_html(input_file, header=1)[0]
-    df = df.iloc[:, [1, 6]]
-    df.columns = ['Nome', 'CEP']
-    df['Nome'] = df['Nome'].str.upper()
-    df['CEP'] = (
-    df['CEP']
-    .astype(str)
-    .str.replace(r'\D', '', regex=True)
-    .str.zfill(8)
-    )
-    df = pd.DataFrame({
-        'Nome': df['Nome'],
-        'CEP': df['CEP'],
-        'Modalidade': '',
-        'Peso': '',
-        'Alt.': '',
-        'Lar.': '',
-        'Com.': '',
-        'Valor': ''
-    })
+COLUMN_WIDTHS = {
+    'A': 71.43, # Nome
+    'B': 12.14, # CEP
+    'C': 13.57, # Modalidade
+    'D': 8.57,  # Peso
+    'E': 10,    # Altura
+    'F': 10,    # Largura
+    'G': 10,    # Comprimento
+    'H': 12.14  # Valor
+}
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Quotes"
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), start=1):
-        for c_idx, value in enumerate(row, start=1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.font = FONT_ARIAL_12
-            cell.alignment = Alignment(horizontal="center" if r_idx == 1 else "left" if c_idx == 1 and r_idx > 1 else "center")
+STYLE_VARIANTS = {
+    1: "name",     # Nome
+    4: "weight",   # Peso
+    5: "size",     # Altura
+    6: "size",     # Largura
+    7: "size",     # Comprimento
+    8: "currency"  # Valor
+}
+FOOTER_STYLES = {
+    4: "footer-weight",
+    5: "footer-size",
+    6: "footer-size",
+    7: "footer-size"
+}
 
-    modalidade_options = ["RETIRA", "IM", "PAC Min.", "PAC", "2x PAC", "SEDEX", "OUTRO"]
-    dv = DataValidation(type="list", formula1=f"\"{','.join(modalidade_options)}\"", showDropDown=False)
-    dv.showErrorMessage = True
-    ws.add_data_validation(dv)
-    for row in range(2, ws.max_row):
-        dv.add(ws.cell(row=row, column=3))
+def write_quotes_sheet(ws, df):
+    # The last row of the export is its totals line and is replaced by the
+    # footer.
+    set_column_widths(ws, COLUMN_WIDTHS)
+    ws.freeze_panes = "A2"
+    summary_row = len(df) + 1
+    if summary_row > 2:
+        add_list_validation(ws, MODALIDADE_OPTIONS, f"C2:C{summary_row - 1}")
 
-    column_widths = {
-        'A': 71.43, # Nome
-        'B': 12.14, # CEP
-        'C': 13.57, # Modalidade
-        'D': 8.57,  # Peso
-        'E': 10,    # Altura
-        'F': 10,    # Largura
-        'G': 10,    # Comprimento
-        'H': 12.14  # Valor
-    }
-    for col, width in column_widths.items():
-        ws.column_dimensions[col].width = width
+    ws.append([
+        styled_cell(ws, header, "header")
+        for header in df.columns
+    ])
+    for r_idx, row in enumerate(df.itertuples(index=False), start=2):
+        values = [row[0], row[1], row[2]] + lookup_formulas(r_idx)
+        if r_idx == summary_row:
+            values = [f"=COUNTA(A2:A{summary_row - 1})"] + [""] * 6 + [f"=COUNTBLANK(H2:H{summary_row - 1})"]
+            ws.append([
+                styled_cell(ws, value, FOOTER_STYLES.get(c_idx, "footer"))
+                for c_idx, value in enumerate(values, start=1)
+            ])
+            continue
+        ws.append([
+            styled_cell(ws, value, body_style(r_idx, STYLE_VARIANTS.get(c_idx)))
+            for c_idx, value in enumerate(values, start=1)
+        ])
 
-    for row in range(2, ws.max_row + 1):
-        modalidade_cell = ws.cell(row=row, column=3)
-        peso_cell = ws.cell(row=row, column=4)
-        altura_cell = ws.cell(row=row, column=5)
-        largura_cell = ws.cell(row=row, column=6)
-        comprimento_cell = ws.cell(row=row, column=7)
-        valor_cell = ws.cell(row=row, column=8)
+def process_quotes(streaming=False, use_cache=True, directory=None, files=None, arrematantes_df=None, config_file=None, config=None):
+    current_directory = directory or os.getcwd()
+    if files is None:
+        files = list_directory(current_directory)
 
-        peso_cell.value = (
-            f'=IF({modalidade_cell.coordinate}="PAC Min.", "1,0 Kg", ' 
-            f'IF({modalidade_cell.coordinate}="RETIRA", "-", ""))'
-        )
-        altura_cell.value = (
-            f'=IF({modalidade_cell.coordinate}="PAC Min.", "-", ' 
-            f'IF({modalidade_cell.coordinate}="IM", "-", ' 
-            f'IF({modalidade_cell.coordinate}="RETIRA", "-", "")))'
-        )
-        largura_cell.value = (
-            f'=IF({modalidade_cell.coordinate}="PAC Min.", "-", ' 
-            f'IF({modalidade_cell.coordinate}="IM", "-", ' 
-            f'IF({modalidade_cell.coordinate}="RETIRA", "-", "")))'
-        )
-        comprimento_cell.value = (
-            f'=IF({modalidade_cell.coordinate}="PAC Min.", "-", ' 
-            f'IF({modalidade_cell.coordinate}="IM", "-", ' 
-            f'IF({modalidade_cell.coordinate}="RETIRA", "-", "")))'
-        )
-        valor_cell.value = (
-            f'=IF({modalidade_cell.coordinate}="RETIRA", "-", ' 
-            f'IF(AND({modalidade_cell.coordinate}="IM", ' 
-            f'ISNUMBER(MATCH(LEFT({peso_cell.coordinate}, FIND(" ", {peso_cell.coordinate})-1), ' 
-            f'{{"0,3","0,9","2,0"}}, 0))), ' 
-            f'VLOOKUP(LEFT({peso_cell.coordinate}, FIND(" ", {peso_cell.coordinate})-1), ' 
-            f'{{"0,3",{im_values["0.3Kg"]};"0,9",{im_values["0.9Kg"]};"2,0",{im_values["2.0Kg"]}}}, 2, FALSE), ""))'
-        )
+    input_file = find_arrematantes(files)
+    if not input_file:
+        raise FileNotFoundError("No input file matching 'Arrematantes_Leilao_#####.xls' found in the current directory.")
+    input_file = os.path.join(current_directory, input_file)
+    config = config or load_config(config_file or config_path(current_directory))
+    output_file = os.path.join(current_directory, f"Cotações_Leilão_{file_number(input_file)}.xlsx")
+    im_values = dict(config.im_values)
 
-        valor_cell.number_format = '"R$" #,##0.00'
-        peso_cell.number_format = '#,0.0 "Kg"'
-        altura_cell.number_format = '##0 "cm"'
-        largura_cell.number_format = '##0 "cm"'
-        comprimento_cell.number_format = '##0 "cm"'
+    with span("read", file=os.path.basename(input_file)) as measured:
+        if arrematantes_df is None:
+            arrematantes_df = cached_frame(input_file, "arrematantes", read_arrematantes, use_cache)
+        measured["rows"] = len(arrematantes_df)
+    with span("normalize", rows=len(arrematantes_df)):
+        df = pd.DataFrame({
+            'Nome': arrematantes_df['Nome'].str.upper(),
+            'CEP': cep_text(arrematantes_df['CEP']),
+            'Modalidade': '',
+            'Peso': '',
+            'Alt.': '',
+            'Lar.': '',
+            'Com.': '',
+            'Valor': ''
+        })
 
-    summary_row = ws.max_row
-    ws.cell(row=summary_row, column=1).value = f"=COUNTA(A2:A{ws.max_row - 1})"
-    ws.cell(row=summary_row, column=1).font = BOLD_FONT
-    ws.cell(row=summary_row, column=1).alignment = Alignment(horizontal="center")
-    ws.cell(row=summary_row, column=8).value = f"=COUNTBLANK(H2:H{ws.max_row - 1})"
-    ws.cell(row=summary_row, column=8).font = BOLD_FONT
-    ws.cell(row=summary_row, column=8).alignment = Alignment(horizontal="center")
-    ws.cell(row=summary_row, column=8).number_format = 'General'
-    for col in range(2, ws.max_column):
-        if col != 8:
-            ws.cell(row=summary_row, column=col).value = ""
-            ws.cell(row=summary_row, column=col).alignment = Alignment(horizontal="center")
-    
-    ws.freeze_panes = ws['A2']
-    for cell in ws[1]:
-        cell.font = BOLD_FONT
-        cell.fill = HEADER_FILL
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2, max_row=ws.max_row - 1), start=2):
-        fill = LIGHT_GRAY_FILL if row_idx % 2 == 0 else WHITE_FILL
-        for cell in row:
-            cell.fill = fill
-    for cell in ws[ws.max_row]:
-        cell.font = BOLD_FONT
-        cell.fill = FOOTER_FILL
-    for cell in ws[1]:
-        cell.border = HEADER_BORDER
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row - 1):
-        for cell in row:
-            cell.border = VERTICAL_BORDER
-    for cell in ws[ws.max_row]:
-        cell.border = FOOTER_BORDER
+    wb = new_workbook(streaming)
+    with span("write-cells", rows=len(df)):
+        ws = wb.create_sheet(title="Quotes")
+        write_quotes_sheet(ws, df)
+        write_rate_sheet(wb.create_sheet(title=RATE_SHEET_TITLE), im_values)
 
-    wb.save(output_file)
-    print(f"File saved as {output_file}")
+    with span("save", file=os.path.basename(output_file)):
+        wb.save(output_file)
+    print(f"File saved as {os.path.basename(output_file)}")
+    return output_file
 
 if __name__ == "__main__":
-    process_quotes()
+    from pipeline import main
+    main(["quotes"] + sys.argv[1:])
@@ -0,0 +1,57 @@
+from writer import styled_cell
+
+RATE_SHEET_TITLE = "Tabelas"
+
+# What each Modalidade puts in Peso and in the three dimension columns;
+# Modalidades not listed leave them blank for staff to fill in.
+MODALIDADE_TABLE = [
+    ("RETIRA", "-", "-"),
+    ("IM", "", "-"),
+    ("PAC Min.", "1,0 Kg", "-")
+]
+
+# Weights as typed in the Peso column ("0,3 Kg") and their valores.ini keys
+IM_WEIGHT_KEYS = {
+    "0,3": "0.3Kg",
+    "0,9": "0.9Kg",
+    "2,0": "2.0Kg"
+}
+
+MODALIDADE_RANGE = f"{RATE_SHEET_TITLE}!$A$2:$C${len(MODALIDADE_TABLE) + 1}"
+IM_RANGE = f"{RATE_SHEET_TITLE}!$E$2:$F${len(IM_WEIGHT_KEYS) + 1}"
+
+def write_rate_sheet(ws, im_values):
+    # The tables live once in a hidden sheet so each Cotações row only needs
+    # short VLOOKUPs instead of the IM weights inlined as array constants.
+    ws.sheet_state = "hidden"
+    ws.append([
+        styled_cell(ws, header, "label")
+        for header in ("Modalidade", "Peso", "Dimensão", None, "Peso IM", "Valor IM")
+    ])
+    im_rows = [(weight, im_values[key]) for weight, key in IM_WEIGHT_KEYS.items()]
+    for idx in range(max(len(MODALIDADE_TABLE), len(im_rows))):
+        modalidade, peso, dimension = MODALIDADE_TABLE[idx] if idx < len(MODALIDADE_TABLE) else (None, None, None)
+        weight, valor = im_rows[idx] if idx < len(im_rows) else (None, None)
+        # '=""' keeps VLOOKUP returning an empty text instead of 0
+        ws.append([
+            styled_cell(ws, value if value != "" else '=""', style)
+            for value, style in (
+                (modalidade, "table"), (peso, "table"), (dimension, "table"), (None, "table"),
+                (weight, "table"), (valor, "table-currency")
+            )
+        ])
+
+def lookup_formulas(r_idx):
+    modalidade = f"C{r_idx}"
+    peso = f"D{r_idx}"
+    dimension = f'=IFERROR(VLOOKUP({modalidade},{MODALIDADE_RANGE},3,FALSE),"")'
+    return [
+        f'=IFERROR(VLOOKUP({modalidade},{MODALIDADE_RANGE},2,FALSE),"")',
+        dimension,
+        dimension,
+        dimension,
+        (
+            f'=IF({modalidade}="RETIRA","-",IF({modalidade}="IM",'
+            f'IFERROR(VLOOKUP(LEFT({peso},FIND(" ",{peso})-1),{IM_RANGE},2,FALSE),""),""))'
+        )
+    ]
@@ -1,275 +1,465 @@
-import configparser
+import openpyxl
 import pandas as pd
 import os
-from openpyxl import Workbook
-from openpyxl.worksheet.datavalidation import DataValidation
-from openpyxl.styles import Alignment
-from styles import (
-    FONT_ARIAL_12, BOLD_FONT, HEADER_FILL, FOOTER_FILL,
-    LIGHT_GRAY_FILL, WHITE_FILL, HEADER_BORDER, FOOTER_BORDER, VERTICAL_BORDER
-)
-
-def process_record():
-    current_directory = os.getcwd()
-    arrematantes_file = next((file for file in os.listdir(current_directory) if file.startswith("Arrematantes_Leilao_") and file.endswith(".xls")), None)
-    cotacoes_file = next((file for file in os.listdir(current_directory) if file.startswith("Cotações_Leilão_") and file.endswith(".xlsx")), None)
-    if not arrematantes_file or not cotacoes_file:
-        raise FileNotFoundError("Matching 'Arrematantes_Leilao_#####' and 'Cotações_Leilão_#####' files not found.")
-    file_number = os.path.splitext(os.path.basename(arrematantes_file))[0].split('_')[-1]
-    if file_number != os.path.splitext(os.path.basename(cotacoes_file))[0].split('_')[-1]:
-        raise ValueError("File numbers for 'Arrematantes_Leilao' and 'Cotações_Leilão' do not match.")
-    config_file = os.path.join(current_directory, "valores.ini")
-    if not os.path.exists(config_file):
-        raise FileNotFoundError("Configuration file 'valores.ini' not found in the current directory.")
-    config = configparser.ConfigParser()
-    config.read(config_file)
-    pacote_extra = float(config['Pacote_Extra']['pacote_extra'])
-    comissao = float(config['Comissao']['comissao'])
-    seguro = float(config['Seguro']['seguro'])
-
-    arrematantes_df = pd.read_html(
-        arrematantes_file,
-        header=1,
-        decimal=',',
-        thousands='.'
-    )[0]
-    cotacoes_df = pd.read_excel(cotacoes_file)
-    cotacoes_df = cotacoes_df.dropna(subset=['Nome', 'CEP', 'Modalidade', 'Valor']).reset_index(drop=True)
-    arrematantes_df = arrematantes_df.iloc[:, [0, 5, 11]]
-    arrematantes_df.columns = ['Cartela', 'UF', 'Arrematação']
-    cotacoes_df['CEP'] = cotacoes_df['CEP'].astype(int).astype(str).apply(lambda x: x.zfill(8))
-    cotacoes_df['Valor'] = pd.to_numeric(cotacoes_df['Valor'], errors='coerce')
-    
-    #Debug
-    if 'Arrematação' not in arrematantes_df.columns:
-        raise ValueError("Expected column 'Arrematação' not found in arrematantes file")
-    print(arrematantes_df['Arrematação'].head(10))
-    print(arrematantes_df['Arrematação'].dtype)
-    print(arrematantes_df['Arrematação'].apply(type).value_counts())
-    """    
-    arrematantes_df['Arrematação'] = (
-    arrematantes_df['Arrematação']
-    .astype(str)
-    .str.replace('.', '', regex=False)
-    .str.replace(',', '', regex=False)
-    .replace('nan', pd.NA)
-    .astype(float) / 100
-    )
-    """
-    arrematantes_df['Arrematação'] = pd.to_numeric(arrematantes_df['Arrematação'], errors='coerce')
-    arrematantes_df['Arrematação'] = arrematantes_df['Arrematação'] * (1 + (comissao / 100))
-
-    print(arrematantes_df.dtypes)
+import sys
+from itertools import islice
+from styles import body_style
+from arrematantes import read_arrematantes
+from cache import cached_frame
+from config import load_config
+from matching import join_quotes
+from model import CEP_DTYPE, categorical, centavos, display_frame
+from summary import ficha_summary
+from pricing import shipping_cost, with_commission, total_due
+from auction_files import list_directory, find_arrematantes, find_cotacoes, file_number, config_path
+from parallel_writer import part_size, save_workbook
+from instrumentation import event, frame_fields, span, tracing
+from writer import styled_cell, saved_value, add_list_validation, set_column_widths
 
-    new_df = pd.DataFrame({
-        'Nome': cotacoes_df['Nome'],
-        'Cartela': arrematantes_df['Cartela'],
-        'CEP': cotacoes_df['CEP'],
-        'UF': arrematantes_df['UF'],
-        'Modalidade': cotacoes_df['Modalidade'],
-        'Valor Env.': cotacoes_df.apply(
-            lambda row: (
-                "-" if row['Modalidade'] == "RETIRA" or pd.isna(row['Valor'])
-                else (
-                    float(row['Valor']) + (
-                        pacote_extra if row['Modalidade'] in ["PAC", "PAC Min."]
-                        else 2 * pacote_extra if row['Modalidade'] == "2x PAC"
-                        else 0
-                    )
-                ) * (1 + seguro / 100)
-            ),
-            axis=1
-        ),
-        'Arrematação': arrematantes_df['Arrematação'],
-        'Total': '',
-        'Situação': '',
-        'Observação': ''
-    })
-       
-    new_df['Total'] = new_df.apply(
-        lambda row: row['Arrematação']
-        if row['Valor Env.'] == '-'
-        else row['Arrematação'] + row['Valor Env.'],
-        axis=1
-    )
-
-    output_file = f"Ficha_Leilão_{file_number}.xlsx"
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ficha"
-
-    header = [
-        "Nome", "Cartela", "CEP", "UF",
-        "Modalidade", "Valor Env.",
-        "Arrematação", "Total",
-        "Situação", "Observação"
-    ]
-    for col_num, header_text in enumerate(header, start=1):
-        cell = ws.cell(row=1, column=col_num, value=header_text)
-        cell.font = BOLD_FONT
-        cell.alignment = Alignment(horizontal="center")
-    for r_idx, row in enumerate(new_df.itertuples(index=False), start=2):
-        for c_idx, value in enumerate(row, start=1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.font = FONT_ARIAL_12
-            cell.alignment = Alignment(horizontal="center" if c_idx > 1 else "left")
-            if c_idx in [6, 7, 8]:
-                if isinstance(value, (int, float)):
-                    cell.number_format = '"R$" #,##0.00'
-    
-    situacao_options = ["PG Arrematação", "PG Arrem. + Env.", "PG Desistência", "Outro"]
-    dv = DataValidation(type="list", formula1=f"\"{','.join(situacao_options)}\"", showDropDown=False)
-    dv.showErrorMessage = True
-    ws.add_data_validation(dv)
-    for row in range(2, ws.max_row):
-        dv.add(ws.cell(row=row, column=9))
-    column_widths = {
-        'A': 71.43,  # Nome
-        'B': 9.28,   # Cartela
-        'C': 12,     # CEP
-        'D': 5,      # UF
-        'E': 13.57,  # Modalidade
-        'F': 15,     # Valor Env.
-        'G': 16.50,  # Arrematação
-        'H': 16.50,  # Total
-        'I': 21.42,  # Situação
-        'J': 86      # Observação
-    }
-    for col, width in column_widths.items():
-        ws.column_dimensions[col].width = width
-
-    summary_row = ws.max_row
-    ws.cell(row=summary_row, column=1).value = f"=COUNTA(A2:A{ws.max_row - 1})"
-    ws.cell(row=summary_row, column=5).value = "Total"
-    ws.cell(row=summary_row, column=6).value = f"=SUM(F2:F{ws.max_row - 1})"
-    ws.cell(row=summary_row, column=7).value = f"=SUM(G2:G{ws.max_row - 1})"
-    ws.cell(row=summary_row, column=8).value = f"=SUM(H2:H{ws.max_row - 1})"
-    ws.cell(row=summary_row, column=9).value = (
-    f'=COUNTIFS(I2:I{summary_row - 1}, "")'
-    f'+ COUNTIFS(I2:I{summary_row - 1}, "PG Arrematação")'
-    f'- COUNTIFS(F2:F{summary_row - 1}, "-", I2:I{summary_row - 1}, "PG Arrematação")'
-    )
-    for col in range(1, ws.max_column):
-        if col > 1 and col <= 4 and col == 10:
-            ws.cell(row=summary_row, column=col).value = ""
-        ws.cell(row=summary_row, column=col).alignment = Alignment(horizontal="center")
-        ws.cell(row=summary_row, column=col).font = BOLD_FONT
-    
-    ws.freeze_panes = ws['A2']
-    for cell in ws[1]:
-        cell.font = BOLD_FONT
-        cell.fill = HEADER_FILL
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2, max_row=ws.max_row - 1), start=2):
-        fill = LIGHT_GRAY_FILL if row_idx % 2 == 0 else WHITE_FILL
-        for cell in row:
-            cell.fill = fill
-    for cell in ws[ws.max_row]:
-        cell.font = BOLD_FONT
-        cell.fill = FOOTER_FILL
-    for cell in ws[1]:
-        cell.border = HEADER_BORDER
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row - 1):
-        for cell in row:
-            cell.border = VERTICAL_BORDER
-    for cell in ws[ws.max_row]:
-        cell.border = FOOTER_BORDER
-
-    # Sheet 2
-    info_ws = wb.create_sheet(title="Info")
-    info_ws["A1"] = "Comissão"
-    info_ws["B1"] = f"=Ficha!G{summary_row}*{comissao/100}"
-    info_ws["B3"] = "Envios"
-    info_ws["C3"] = "Arrematação"
-    info_ws["D3"] = "Comissão"
-    info_ws["E3"] = "Total"
-    info_ws["A4"] = "A Receber"
-    info_ws["B4"] = (
-        f"=Ficha!F{summary_row} - SUMIFS(Ficha!F2:F{summary_row-1}, Ficha!I2:I{summary_row-1}, \"PG Arrem. + Env.\") - SUMIFS(Ficha!F2:F{summary_row-1}, Ficha!I2:I{summary_row-1}, \"PG Desistência\")"
-    )
-
-    info_ws["C4"] = (
-        f"=Ficha!G{summary_row} - SUMIFS(Ficha!G2:G{summary_row-1}, Ficha!I2:I{summary_row-1}, \"PG Arrematação\") - SUMIFS(Ficha!G2:G{summary_row-1}, Ficha!I2:I{summary_row-1}, \"PG Arrem. + Env.\") - SUMIFS(Ficha!G2:G{summary_row-1}, Ficha!I2:I{summary_row-1}, \"PG Desistência\")"
-    )
-
-    info_ws["D4"] = (
-        f"=Info!B1 - SUMIFS(Ficha!G2:G{summary_row-1}, Ficha!I2:I{summary_row-1}, \"<>\" & \"\") * {comissao/100}"
-    )
-    info_ws["E4"] = (
-        f"=Ficha!H{summary_row} - SUMIFS(Ficha!H2:H{summary_row-1}, Ficha!I2:I{summary_row-1}, \"<>\" & \"\")"
-    )
-    info_ws["A6"] = "RETIRA"
-    info_ws["A7"] = "IM"
-    info_ws["A8"] = "PAC Min."
-    info_ws["A9"] = "PAC"
-    info_ws["A10"] = "2x PAC"
-    info_ws["A11"] = "SEDEX"
-    info_ws["A12"] = "OUTRO"
-    info_ws["B6"] = f"=COUNTIF(Ficha!E2:E{summary_row-1}, \"RETIRA\")"
-    info_ws["B7"] = f"=COUNTIF(Ficha!E2:E{summary_row-1}, \"IM\")"
-    info_ws["B8"] = f"=COUNTIF(Ficha!E2:E{summary_row-1}, \"PAC Min.\")"
-    info_ws["B9"] = f"=COUNTIF(Ficha!E2:E{summary_row-1}, \"PAC\")"
-    info_ws["B10"] = f"=COUNTIF(Ficha!E2:E{summary_row-1}, \"2x PAC\")"
-    info_ws["B11"] = f"=COUNTIF(Ficha!E2:E{summary_row-1}, \"SEDEX\")"
-    info_ws["B12"] = f"=COUNTIF(Ficha!E2:E{summary_row-1}, \"OUTRO\")"
-
-    info_column_widths = {
+HEADER = [
+    "Nome", "Cartela", "CEP", "UF",
+    "Modalidade", "Valor Env.",
+    "Arrematação", "Total",
+    "Situação", "Observação"
+]
+
+SITUACAO_OPTIONS = ["PG Arrematação", "PG Arrem. + Env.", "PG Desistência", "Outro"]
+
+COLUMN_WIDTHS = {
+    'A': 71.43,  # Nome
+    'B': 9.28,   # Cartela
+    'C': 12,     # CEP
+    'D': 5,      # UF
+    'E': 13.57,  # Modalidade
+    'F': 15,     # Valor Env.
+    'G': 16.50,  # Arrematação
+    'H': 16.50,  # Total
+    'I': 21.42,  # Situação
+    'J': 86      # Observação
+}
+
+INFO_COLUMN_WIDTHS = {
     "A": 12.85,  # Comissão, A Receber
     "B": 16.50,  # Envios
     "C": 16.50,  # Arrematação
     "D": 16.50,  # Comissão
     "E": 16.50,  # Total
+}
+
+REPORT_SHEET_TITLE = "Conferência"
+
+REPORT_COLUMN_WIDTHS = {
+    "A": 26,     # Situação
+    "B": 71.43,  # Nome
+    "C": 12,     # CEP
+    "D": 9.28    # Cartela
+}
+
+MODALIDADES = ["RETIRA", "IM", "PAC Min.", "PAC", "2x PAC", "SEDEX", "OUTRO"]
+
+CURRENCY_COLUMNS = (6, 7, 8)
+
+CARTELA_COLUMN = 2
+MODALIDADE_COLUMN = 5
+SHIPPING_COLUMN = 6
+NO_SHIPPING = "-"
+
+SITUACAO_COLUMN = 9
+OBSERVACAO_COLUMN = 10
+USER_COLUMNS = (SITUACAO_COLUMN, OBSERVACAO_COLUMN)
+
+COTACOES_COLUMNS = ['Nome', 'CEP', 'Modalidade', 'Valor']
+COTACOES_BATCH_ROWS = 50_000
+
+def ficha_footer(summary_row, summary=None):
+    if summary is not None:
+        return {
+            1: summary['nomes'],
+            5: "Total",
+            6: summary['envios'],
+            7: summary['arrematacao'],
+            8: summary['total'],
+            9: summary['pendentes']
+        }
+    last = summary_row - 1
+    return {
+        1: f"=COUNTA(A2:A{last})",
+        5: "Total",
+        6: f"=SUM(F2:F{last})",
+        7: f"=SUM(G2:G{last})",
+        8: f"=SUM(H2:H{last})",
+        9: (
+            f'=COUNTIFS(I2:I{last}, "")'
+            f'+ COUNTIFS(I2:I{last}, "PG Arrematação")'
+            f'- COUNTIFS(F2:F{last}, "-", I2:I{last}, "PG Arrematação")'
+        )
     }
-    for col, width in info_column_widths.items():
-        info_ws.column_dimensions[col].width = width
 
-    for row in info_ws.iter_rows():
-        for cell in row:
-            cell.font = FONT_ARIAL_12
-    info_ws["A1"].alignment = Alignment(horizontal="left")
-    for row in range(1, 13):
-        for col in range(2, 6):
-            info_ws.cell(row=row, column=col).alignment = Alignment(horizontal="center")
-    for col in range(1, 6):
-        info_ws.cell(row=3, column=col).font = BOLD_FONT
-        info_ws.cell(row=3, column=col).fill = HEADER_FILL
-    for row in range(1, 13):
-        info_ws[f"A{row}"].font = BOLD_FONT
-        info_ws[f"A{row}"].fill = HEADER_FILL
-    info_ws["B1"].number_format = '"R$" #,##0.00'
-    info_ws["D4"].number_format = '"R$" #,##0.00'
-
-    vertical_border_ranges = [
-    ("A1", "B1"),
-    ("A3", "E3"),
-    ("A4", "E4"),
-    ("A6", "B6"),
-    ("A7", "B7"),
-    ("A8", "B8"),
-    ("A9", "B9"),
-    ("A10", "B10"),
-    ("A11", "B11"),
-    ("A12", "B12"),
+def ficha_cells(row, r_idx, summary_row, footer):
+    # (value, style) for each column of a Ficha row as it is written.
+    is_footer = r_idx == summary_row
+    cells = []
+    for c_idx, value in enumerate(row, start=1):
+        if c_idx == SHIPPING_COLUMN and pd.isna(value) and not pd.isna(row[MODALIDADE_COLUMN - 1]):
+            value = NO_SHIPPING
+        variant = None
+        if c_idx in CURRENCY_COLUMNS and isinstance(value, (int, float)):
+            variant = "currency"
+        elif c_idx == 1 and not is_footer:
+            variant = "name"
+        if is_footer:
+            value = footer.get(c_idx, value)
+            style = f"footer-{variant}" if variant else "footer"
+        else:
+            style = body_style(r_idx, variant)
+        cells.append((value, style))
+    return cells
+
+def write_ficha_header(ws, summary_row):
+    set_column_widths(ws, COLUMN_WIDTHS)
+    ws.freeze_panes = "A2"
+    if summary_row > 2:
+        add_list_validation(ws, SITUACAO_OPTIONS, f"I2:I{summary_row - 1}")
+    ws.append([
+        styled_cell(ws, header, "header")
+        for header in HEADER
+    ])
+
+def write_ficha_rows(ws, rows_df, first_row, summary_row, summary=None):
+    footer = ficha_footer(summary_row, summary)
+    for r_idx, row in enumerate(display_frame(rows_df).itertuples(index=False), start=first_row):
+        ws.append([
+            styled_cell(ws, value, style)
+            for value, style in ficha_cells(row, r_idx, summary_row, footer)
+        ])
+
+def write_ficha_sheet(ws, new_df, summary=None):
+    # The last row comes from the export's totals line and is replaced by the
+    # footer, keeping the columns the footer does not use.
+    summary_row = len(new_df) + 1
+    write_ficha_header(ws, summary_row)
+    write_ficha_rows(ws, new_df, 2, summary_row, summary)
+    return summary_row
+
+def ficha_sheets(new_df, report, comissao, summary=None, rows_per_part=None):
+    # The record workbook as (title, parts) for save_workbook; the Ficha rows
+    # are split so each part can be written by its own process.
+    summary_row = len(new_df) + 1
+    rows_per_part = rows_per_part or max(len(new_df), 1)
+    ficha_parts = [(1, [(write_ficha_header, (summary_row,))])]
+    for start in range(0, len(new_df), rows_per_part):
+        step = (write_ficha_rows, (new_df.iloc[start:start + rows_per_part], start + 2, summary_row, summary))
+        if start == 0:
+            ficha_parts[0][1].append(step)
+        else:
+            ficha_parts.append((start + 2, [step]))
+    sheets = [
+        ("Ficha", ficha_parts),
+        ("Info", [(1, [(write_info_sheet, (summary_row, comissao, summary))])])
     ]
+    if len(report):
+        sheets.append((REPORT_SHEET_TITLE, [(1, [(write_report_sheet, (report,))])]))
+    return sheets
+
+def info_values(summary_row, comissao, summary=None):
+    if summary is not None:
+        values = {
+            "A1": "Comissão",
+            "B1": summary['comissao'],
+            "B3": "Envios",
+            "C3": "Arrematação",
+            "D3": "Comissão",
+            "E3": "Total",
+            "A4": "A Receber",
+            "B4": summary['envios_a_receber'],
+            "C4": summary['arrematacao_a_receber'],
+            "D4": summary['comissao_a_receber'],
+            "E4": summary['total_a_receber']
+        }
+        for row, modalidade in enumerate(MODALIDADES, start=6):
+            values[f"A{row}"] = modalidade
+            values[f"B{row}"] = summary['modalidades'][modalidade]
+        return values
+    last = summary_row - 1
+    values = {
+        "A1": "Comissão",
+        "B1": f"=Ficha!G{summary_row}*{comissao/100}",
+        "B3": "Envios",
+        "C3": "Arrematação",
+        "D3": "Comissão",
+        "E3": "Total",
+        "A4": "A Receber",
+        "B4": (
+            f"=Ficha!F{summary_row} - SUMIFS(Ficha!F2:F{last}, Ficha!I2:I{last}, \"PG Arrem. + Env.\") - SUMIFS(Ficha!F2:F{last}, Ficha!I2:I{last}, \"PG Desistência\")"
+        ),
+        "C4": (
+            f"=Ficha!G{summary_row} - SUMIFS(Ficha!G2:G{last}, Ficha!I2:I{last}, \"PG Arrematação\") - SUMIFS(Ficha!G2:G{last}, Ficha!I2:I{last}, \"PG Arrem. + Env.\") - SUMIFS(Ficha!G2:G{last}, Ficha!I2:I{last}, \"PG Desistência\")"
+        ),
+        "D4": (
+            f"=Info!B1 - SUMIFS(Ficha!G2:G{last}, Ficha!I2:I{last}, \"<>\" & \"\") * {comissao/100}"
+        ),
+        "E4": (
+            f"=Ficha!H{summary_row} - SUMIFS(Ficha!H2:H{last}, Ficha!I2:I{last}, \"<>\" & \"\")"
+        ),
+    }
+    for row, modalidade in enumerate(MODALIDADES, start=6):
+        values[f"A{row}"] = modalidade
+        values[f"B{row}"] = f"=COUNTIF(Ficha!E2:E{last}, \"{modalidade}\")"
+    return values
+
+def record_summary(new_df, comissao, summary_mode):
+    # "values" writes the footer and Info results computed here instead of
+    # formulas, for readers that cannot recalculate the workbook.
+    return ficha_summary(new_df, comissao, MODALIDADES) if summary_mode == "values" else None
+
+def info_style(row, col):
+    if col == 1:
+        if row == 1:
+            return "label-title"
+        if row in (2, 5):
+            return "label-blank"
+        return "label-blank-boxed" if row == 3 else "label-boxed"
+    if row == 3:
+        return "label-heading"
+    if (row, col) in ((1, 2), (4, 4)):
+        return "value-currency"
+    if row == 4 or (col == 2 and (row == 1 or row >= 6)):
+        return "value"
+    return "value-blank"
+
+def write_info_sheet(ws, summary_row, comissao, summary=None):
+    set_column_widths(ws, INFO_COLUMN_WIDTHS)
+    values = info_values(summary_row, comissao, summary)
+    for row in range(1, 13):
+        cells = []
+        for col, letter in enumerate("ABCDE", start=1):
+            cells.append(styled_cell(ws, values.get(f"{letter}{row}"), info_style(row, col)))
+        ws.append(cells)
+
+def build_record(arrematantes_df, cotacoes_df, config):
+    with span("normalize", rows=len(arrematantes_df)):
+        joined, report = join_quotes(arrematantes_df, cotacoes_df)
+    with span("compute", rows=len(joined)):
+        new_df = price_rows(joined, config)
+    return new_df, report
+
+def price_rows(joined, config):
+    new_df = pd.DataFrame({
+        'Nome': joined['Nome'],
+        'Cartela': joined['Cartela'],
+        'CEP': joined['CEP'],
+        'UF': joined['UF'],
+        'Modalidade': joined['Modalidade'],
+        'Valor Env.': shipping_cost(joined['Modalidade'], joined['Valor'], config.surcharges, config.seguro_factor),
+        'Arrematação': with_commission(joined['Arrematação'], config.comissao_factor),
+        'Total': '',
+        'Situação': '',
+        'Observação': ''
+    })
+    new_df['Total'] = total_due(new_df['Arrematação'], new_df['Valor Env.'])
+    return new_df
+
+def write_report_sheet(ws, report):
+    set_column_widths(ws, REPORT_COLUMN_WIDTHS)
+    ws.freeze_panes = "A2"
+    ws.append([styled_cell(ws, header, "header") for header in report.columns])
+    for r_idx, row in enumerate(report.itertuples(index=False), start=2):
+        ws.append([
+            styled_cell(ws, None if pd.isna(value) else value, body_style(r_idx, "name" if c_idx == 2 else None))
+            for c_idx, value in enumerate(row, start=1)
+        ])
+
+def read_ficha(ficha_file):
+    # Values as saved, formulas included, to diff against a new computation.
+    wb = openpyxl.load_workbook(ficha_file, read_only=True)
+    try:
+        width = len(HEADER)
+        rows = [
+            tuple(row) + (None,) * (width - len(row))
+            for row in wb["Ficha"].iter_rows(min_row=2, max_col=width, values_only=True)
+        ]
+        info = {}
+        for r_idx, row in enumerate(wb["Info"].iter_rows(values_only=True), start=1):
+            for letter, value in zip("ABCDE", row):
+                if value is not None:
+                    info[f"{letter}{r_idx}"] = value
+        report_rows = []
+        if REPORT_SHEET_TITLE in wb.sheetnames:
+            report_rows = [tuple(row) for row in wb[REPORT_SHEET_TITLE].iter_rows(values_only=True)]
+    finally:
+        wb.close()
+    return rows, info, report_rows
+
+def keep_user_columns(new_df, rows, cartelas):
+    # Situação and Observação are typed in by staff, so they follow the
+    # bidder's Cartela from the previous Ficha.
+    entered = {
+        row[CARTELA_COLUMN - 1]: (row[SITUACAO_COLUMN - 1], row[OBSERVACAO_COLUMN - 1])
+        for row in rows if row[CARTELA_COLUMN - 1] is not None
+    }
+    previous = [entered.get(cartela, (None, None)) for cartela in cartelas]
+    new_df['Situação'] = [situacao or '' for situacao, _ in previous]
+    new_df['Observação'] = [observacao or '' for _, observacao in previous]
+
+def update_ficha(ficha_file, new_df, report, comissao, summary_mode="formulas"):
+    # Rewrites only the cells whose computed value changed. Returns the number
+    # of cells changed, or None when bidders were added, removed or reordered
+    # and the Ficha has to be rebuilt.
+    with span("read", file=os.path.basename(ficha_file)) as measured:
+        rows, info, report_rows = read_ficha(ficha_file)
+        measured["rows"] = len(rows)
+    values = display_frame(new_df)
+    cartelas = [saved_value(cartela) for cartela in values['Cartela']]
+    keep_user_columns(new_df, rows, cartelas)
+    if cartelas != [row[CARTELA_COLUMN - 1] for row in rows]:
+        return None
+
+    with span("compute", rows=len(new_df)):
+        summary_row = len(new_df) + 1
+        summary = record_summary(new_df, comissao, summary_mode)
+        footer = ficha_footer(summary_row, summary)
+        ficha_changes = []
+        for r_idx, (saved, row) in enumerate(zip(rows, values.itertuples(index=False)), start=2):
+            for c_idx, (value, style) in enumerate(ficha_cells(row, r_idx, summary_row, footer), start=1):
+                # The footer's I column holds the pendentes count, not
+                # staff input
+                is_user_cell = c_idx in USER_COLUMNS and r_idx < summary_row
+                if not is_user_cell and saved_value(value) != saved[c_idx - 1]:
+                    ficha_changes.append((r_idx, c_idx, value, style))
+        info_changes = {
+            coordinate: value
+            for coordinate, value in info_values(summary_row, comissao, summary).items()
+            if info.get(coordinate) != saved_value(value)
+        }
+        report_values = [tuple(report.columns)] if len(report) else []
+        report_values += [tuple(saved_value(value) for value in row) for row in report.itertuples(index=False)]
+        report_changed = report_values != report_rows
+    if not ficha_changes and not info_changes and not report_changed:
+        return 0
+
+    with span("write-cells", rows=len(ficha_changes)):
+        wb = openpyxl.load_workbook(ficha_file)
+        ws = wb["Ficha"]
+        for r_idx, c_idx, value, style in ficha_changes:
+            cell = ws.cell(row=r_idx, column=c_idx)
+            cell.value = saved_value(value)
+            cell.style = style
+        for coordinate, value in info_changes.items():
+            wb["Info"][coordinate].value = value
+        if report_changed:
+            if REPORT_SHEET_TITLE in wb.sheetnames:
+                wb.remove(wb[REPORT_SHEET_TITLE])
+            if len(report):
+                write_report_sheet(wb.create_sheet(title=REPORT_SHEET_TITLE), report)
+    with span("save", file=os.path.basename(ficha_file)):
+        wb.save(ficha_file)
+    return len(ficha_changes) + len(info_changes) + (len(report_values) * len(report.columns) if report_changed else 0)
+
+def typed_cotacoes(cotacoes_df):
+    with span("parse", rows=len(cotacoes_df)):
+        cotacoes_df = cotacoes_df.dropna(subset=COTACOES_COLUMNS).reset_index(drop=True)
+        cotacoes_df['CEP'] = cotacoes_df['CEP'].astype(int).astype(CEP_DTYPE)
+        cotacoes_df['Modalidade'] = categorical(cotacoes_df['Modalidade'])
+        cotacoes_df['Valor'] = centavos(cotacoes_df['Valor'])
+    return cotacoes_df
+
+def cotacoes_batches(cotacoes_file, batch_rows):
+    # The first sheet's columns, by header, in frames of at most batch_rows
+    # rows. Formula cells give the value Excel last calculated.
+    wb = openpyxl.load_workbook(cotacoes_file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        missing = [column for column in COTACOES_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"Columns {', '.join(missing)} not found in {os.path.basename(cotacoes_file)}")
+        positions = [header.index(column) for column in COTACOES_COLUMNS]
+        while True:
+            batch = [
+                tuple(row[pos] if pos < len(row) else None for pos in positions)
+                for row in islice(rows, batch_rows)
+            ]
+            if not batch:
+                return
+            yield typed_cotacoes(pd.DataFrame(batch, columns=COTACOES_COLUMNS, dtype=object))
+    finally:
+        wb.close()
+
+def read_cotacoes(cotacoes_file, batch_rows=COTACOES_BATCH_ROWS):
+    batches = list(cotacoes_batches(cotacoes_file, batch_rows))
+    if not batches:
+        return typed_cotacoes(pd.DataFrame(columns=COTACOES_COLUMNS, dtype=object))
+    cotacoes_df = pd.concat(batches, ignore_index=True)
+    # Each batch has its own categories
+    cotacoes_df['Modalidade'] = categorical(cotacoes_df['Modalidade'].astype(object))
+    return cotacoes_df
+
+def print_saved(output_file, report):
+    if len(report):
+        print(f"{len(report)} bidders and quotes need checking, see the '{REPORT_SHEET_TITLE}' sheet")
+    print(f"File saved as {os.path.basename(output_file)}")
+
+def process_record(streaming=False, use_cache=True, directory=None, files=None, arrematantes_df=None, cotacoes_df=None, config_file=None, update=False, summary_mode="formulas", workers=None, chunk_size=None, config=None):
+    current_directory = directory or os.getcwd()
+    if files is None:
+        files = list_directory(current_directory)
+    arrematantes_file = find_arrematantes(files)
+    cotacoes_file = find_cotacoes(files)
+    if not arrematantes_file or not cotacoes_file:
+        raise FileNotFoundError("Matching 'Arrematantes_Leilao_#####' and 'Cotações_Leilão_#####' files not found.")
+    number = file_number(arrematantes_file)
+    if number != file_number(cotacoes_file):
+        raise ValueError("File numbers for 'Arrematantes_Leilao' and 'Cotações_Leilão' do not match.")
+    config = config or load_config(config_file or config_path(current_directory))
+    output_file = os.path.join(current_directory, f"Ficha_Leilão_{number}.xlsx")
+
+    if chunk_size:
+        # Large auctions: the Ficha is streamed a batch of bidders at a time
+        # and never held in memory, so there is no frame to return.
+        if update or (workers and workers > 1):
+            raise ValueError("Chunked processing writes a new Ficha in one process; it cannot be combined with --update or --workers.")
+        from chunked import write_record_chunked
+        report = write_record_chunked(
+            output_file, os.path.join(current_directory, arrematantes_file), os.path.join(current_directory, cotacoes_file),
+            config, summary_mode, chunk_size
+        )
+        print_saved(output_file, report)
+        return None
+
+    with span("read", file=arrematantes_file) as measured:
+        if arrematantes_df is None:
+            arrematantes_df = cached_frame(os.path.join(current_directory, arrematantes_file), "arrematantes", read_arrematantes, use_cache)
+        measured["rows"] = len(arrematantes_df)
+    with span("read", file=cotacoes_file) as measured:
+        if cotacoes_df is None:
+            cotacoes_df = cached_frame(os.path.join(current_directory, cotacoes_file), "cotacoes", read_cotacoes, use_cache)
+        measured["rows"] = len(cotacoes_df)
+    if 'Arrematação' not in arrematantes_df.columns:
+        raise ValueError("Expected column 'Arrematação' not found in arrematantes file")
+    if tracing():
+        event(
+            "arrematantes",
+            arrematacao_head=arrematantes_df['Arrematação'].head(10).tolist(),
+            arrematacao_types=arrematantes_df['Arrematação'].map(lambda value: type(value).__name__).value_counts().to_dict(),
+            **frame_fields(arrematantes_df)
+        )
+
+    new_df, report = build_record(arrematantes_df, cotacoes_df, config)
+
+    if update and os.path.exists(output_file):
+        changed = update_ficha(output_file, new_df, report, config.comissao, summary_mode)
+        if changed is not None:
+            print(f"{changed} cells updated in {os.path.basename(output_file)}")
+            return new_df
+        print("Bidders changed since the last Ficha, rebuilding it with the entered Situação and Observação")
 
-    for start, end in vertical_border_ranges:
-        start_cell = info_ws[start]
-        end_cell = info_ws[end]
-        for row in range(start_cell.row, end_cell.row + 1):
-            for col in range(start_cell.column, end_cell.column + 1):
-                cell = info_ws.cell(row=row, column=col)
-                cell.border = VERTICAL_BORDER
-    
-    info_ws["A2"].fill = WHITE_FILL
-    info_ws["A3"].fill = WHITE_FILL
-    info_ws["A5"].fill = WHITE_FILL
-    info_ws["B1"].fill = LIGHT_GRAY_FILL
-    for col in range(2, 6):
-        info_ws.cell(row=4, column=col).fill = LIGHT_GRAY_FILL
-    for row in range(6, 13):
-        info_ws[f"B{row}"].fill = LIGHT_GRAY_FILL
-
-    wb.save(output_file)
-    print(f"File saved as {output_file}")
+    with span("compute", rows=len(new_df)):
+        summary = record_summary(new_df, config.comissao, summary_mode)
+    sheets = ficha_sheets(new_df, report, config.comissao, summary, part_size(len(new_df), workers))
+    save_workbook(output_file, sheets, streaming, workers)
+    print_saved(output_file, report)
+    return new_df
 
 if __name__ == "__main__":
-    process_record()
+    from pipeline import main
+    main(["record"] + sys.argv[1:])
@@ -0,0 +1,257 @@
+import csv
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import zipfile
+from itertools import islice
+from list import BIDDER_TEMPLATE, CHUNK_SIZE, MESSAGE_TEMPLATE, SEPARATOR, format_money, format_text
+
+# Output formats of the list stage. "zip" packs whatever the other formats
+# wrote, so on its own it packs the text list.
+FORMATS = ["text", "messages", "csv", "json", "zip"]
+TEMPLATE_FIELDS = ["separator", "nome", "modalidade", "envio", "arrematacao", "total"]
+
+# Batches of rows waiting for each sink; a slow sink makes the Ficha reader
+# wait instead of letting the batches pile up in memory.
+QUEUE_BATCHES = 4
+
+# Characters Windows does not allow in file names
+UNSAFE_NAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+NAME_LENGTH = 80
+
+_DONE = object()
+_ABORT = object()
+
+def check_template(template, source="template"):
+    try:
+        template.format(**{field: "" for field in TEMPLATE_FIELDS})
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"Invalid {source}: {e!r}. Available fields: {', '.join(TEMPLATE_FIELDS)}") from e
+    return template
+
+def load_template(template_file):
+    with open(template_file, encoding="utf-8") as f:
+        return check_template(f.read(), f"template '{template_file}'")
+
+def render(template, row):
+    nome, modalidade, envio, arrematacao, total = row
+    return template.format(
+        separator=SEPARATOR,
+        nome=format_text(nome),
+        modalidade=format_text(modalidade),
+        envio=format_money(envio),
+        arrematacao=format_money(arrematacao),
+        total=format_money(total)
+    )
+
+def _amount(value):
+    # Plain numbers for other tools, rounded like the Ficha shows them. The
+    # Ficha's "-" for no shipping is only for people: exports leave it empty
+    # (null in JSON), like a bidder without a quote.
+    return round(value, 2) if isinstance(value, (int, float)) else None
+
+class FileSink:
+    # Written next to the output and moved over it only once every row is
+    # in, so a failed run keeps the previous file instead of a partial one.
+    encoding = 'utf-8'
+    newline = None
+
+    def __init__(self, output_file, template):
+        self.output_file = output_file
+        self.template = template
+        self.outputs = [output_file]
+        parent, name = os.path.split(output_file)
+        self.build_file = os.path.join(parent, f".{name}.tmp")
+
+    def open(self):
+        self.file = open(self.build_file, 'w', encoding=self.encoding, newline=self.newline)
+
+    def close(self, completed):
+        self.file.close()
+        try:
+            if completed:
+                # Fails on Windows while the old file is open in Excel
+                os.replace(self.build_file, self.output_file)
+        finally:
+            if os.path.exists(self.build_file):
+                os.remove(self.build_file)
+
+class TextSink(FileSink):
+    # The Lista
+    def __init__(self, output_file, template=MESSAGE_TEMPLATE):
+        super().__init__(output_file, template)
+
+    def write(self, rows):
+        self.file.write("".join(render(self.template, row) for row in rows))
+
+class MessageFilesSink:
+    # One text file per bidder, numbered in Ficha order so repeated names
+    # never collide. The folder is built next to the old one and swapped in
+    # at the end, so a failed run leaves the previous messages in place.
+    def __init__(self, output_dir, template=BIDDER_TEMPLATE):
+        self.output_dir = output_dir
+        self.template = template
+        self.outputs = [output_dir]
+        parent, name = os.path.split(output_dir)
+        self.build_dir = os.path.join(parent, f".{name}.tmp")
+
+    def open(self):
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+        os.makedirs(self.build_dir)
+        self.count = 0
+
+    def write(self, rows):
+        for row in rows:
+            self.count += 1
+            name = UNSAFE_NAME.sub("", str(row[0] or "")).strip(" .")[:NAME_LENGTH].strip(" .")
+            file_name = f"{self.count:05d} {name}.txt" if name else f"{self.count:05d}.txt"
+            with open(os.path.join(self.build_dir, file_name), 'w', encoding='utf-8') as f:
+                f.write(render(self.template, row))
+
+    def close(self, completed):
+        if not completed:
+            shutil.rmtree(self.build_dir, ignore_errors=True)
+            return
+        if os.path.isdir(self.output_dir):
+            shutil.rmtree(self.output_dir)
+        os.replace(self.build_dir, self.output_dir)
+
+class CsvSink(FileSink):
+    # The list values and the rendered message of each bidder. The BOM lets
+    # Excel open the file with the accents intact.
+    HEADER = ["Nome", "Modalidade", "Valor Env.", "Arrematação", "Total", "Mensagem"]
+    encoding = 'utf-8-sig'
+    newline = ''
+
+    def __init__(self, output_file, template=BIDDER_TEMPLATE):
+        super().__init__(output_file, template)
+
+    def open(self):
+        super().open()
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.HEADER)
+
+    def write(self, rows):
+        self.writer.writerows(
+            [row[0], row[1]] + [_amount(value) for value in row[2:]] + [render(self.template, row)]
+            for row in rows
+        )
+
+class JsonSink(FileSink):
+    # A JSON array with one bidder object per line, written as rows arrive.
+    def __init__(self, output_file, template=BIDDER_TEMPLATE):
+        super().__init__(output_file, template)
+
+    def open(self):
+        super().open()
+        self.file.write("[")
+        self.separator = "\n"
+
+    def write(self, rows):
+        lines = []
+        for row in rows:
+            nome, modalidade, envio, arrematacao, total = row
+            lines.append(self.separator + json.dumps({
+                "nome": nome,
+                "modalidade": modalidade,
+                "envio": _amount(envio),
+                "arrematacao": _amount(arrematacao),
+                "total": _amount(total),
+                "mensagem": render(self.template, row)
+            }, ensure_ascii=False))
+            self.separator = ",\n"
+        self.file.write("".join(lines))
+
+    def close(self, completed):
+        if completed:
+            self.file.write("\n]\n")
+        super().close(completed)
+
+def list_sinks(directory, number, formats, list_template=None, message_template=None):
+    list_template = check_template(list_template or MESSAGE_TEMPLATE, "list template")
+    message_template = check_template(message_template or BIDDER_TEMPLATE, "message template")
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown list format(s) {', '.join(sorted(unknown))}, expected: {', '.join(FORMATS)}")
+    base = os.path.join(directory, f"Lista_Leilão_{number}")
+    sinks = []
+    if "text" in formats or set(formats) <= {"zip"}:
+        sinks.append(TextSink(f"{base}.txt", list_template))
+    if "messages" in formats:
+        sinks.append(MessageFilesSink(os.path.join(directory, f"Mensagens_Leilão_{number}"), message_template))
+    if "csv" in formats:
+        sinks.append(CsvSink(f"{base}.csv", message_template))
+    if "json" in formats:
+        sinks.append(JsonSink(f"{base}.json", message_template))
+    return sinks
+
+def _consume(sink, batches, errors):
+    batch = None
+    try:
+        sink.open()
+        try:
+            batch = batches.get()
+            while batch is not _DONE and batch is not _ABORT:
+                sink.write(batch)
+                batch = batches.get()
+        finally:
+            sink.close(batch is _DONE)
+    except Exception as e:
+        errors.append(e)
+        # Keep taking batches until the end marker, also when open() failed
+        # before the first one, so the reader never blocks on this queue
+        while batch is not _DONE and batch is not _ABORT:
+            batch = batches.get()
+
+def fan_out(rows, sinks, batch_rows=CHUNK_SIZE, queue_batches=QUEUE_BATCHES):
+    """Feed the rows to every sink in a single pass, one thread per sink.
+
+    Returns the row count. The first sink error stops the reading and is
+    raised once every sink has closed.
+    """
+    queues = [queue.Queue(queue_batches) for _ in sinks]
+    errors = []
+    threads = [
+        threading.Thread(target=_consume, args=(sink, batches, errors), name=type(sink).__name__, daemon=True)
+        for sink, batches in zip(sinks, queues)
+    ]
+    for thread in threads:
+        thread.start()
+    count = 0
+    end = _ABORT
+    try:
+        rows = iter(rows)
+        batch = list(islice(rows, batch_rows))
+        while batch and not errors:
+            for batches in queues:
+                batches.put(batch)
+            count += len(batch)
+            batch = list(islice(rows, batch_rows))
+        if not errors:
+            end = _DONE
+    finally:
+        for batches in queues:
+            batches.put(end)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return count
+
+def archive(zip_file, outputs):
+    # Folders are stored with their own name as the top-level entry
+    build_file = f"{zip_file}.tmp"
+    with zipfile.ZipFile(build_file, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for output in outputs:
+            if os.path.isdir(output):
+                parent = os.path.dirname(output)
+                for file_name in sorted(os.listdir(output)):
+                    path = os.path.join(output, file_name)
+                    zf.write(path, os.path.relpath(path, parent))
+            else:
+                zf.write(output, os.path.basename(output))
+    os.replace(build_file, zip_file)
+    return zip_file
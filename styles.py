@@ -1,4 +1,4 @@
-from openpyxl.styles import Font, PatternFill, Border, Side
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
 
 # Fonts
 FONT_ARIAL_12 = Font(name='Arial', size=12)
@@ -15,3 +15,64 @@ THIN_BORDER = Side(border_style="thin", color="000000")
 HEADER_BORDER = Border(bottom=THIN_BORDER, left=THIN_BORDER, right=THIN_BORDER)
 FOOTER_BORDER = Border(top=THIN_BORDER, left=THIN_BORDER, right=THIN_BORDER)
 VERTICAL_BORDER = Border(left=THIN_BORDER, right=THIN_BORDER)
+
+# Alignments
+CENTER_ALIGNMENT = Alignment(horizontal="center")
+LEFT_ALIGNMENT = Alignment(horizontal="left")
+
+# Number Formats
+CURRENCY_FORMAT = '"R$" #,##0.00'
+WEIGHT_FORMAT = '#,0.0 "Kg"'
+SIZE_FORMAT = '##0 "cm"'
+
+# Named Styles
+# Every cell gets exactly one of these, so each style is hashed once per
+# workbook instead of once per cell and attribute.
+ROW_STYLES = {
+    "body-even": dict(font=FONT_ARIAL_12, fill=LIGHT_GRAY_FILL, border=VERTICAL_BORDER, alignment=CENTER_ALIGNMENT),
+    "body-odd": dict(font=FONT_ARIAL_12, fill=WHITE_FILL, border=VERTICAL_BORDER, alignment=CENTER_ALIGNMENT),
+    "footer": dict(font=BOLD_FONT, fill=FOOTER_FILL, border=FOOTER_BORDER, alignment=CENTER_ALIGNMENT)
+}
+ROW_STYLE_VARIANTS = {
+    "name": dict(alignment=LEFT_ALIGNMENT),
+    "currency": dict(number_format=CURRENCY_FORMAT),
+    "weight": dict(number_format=WEIGHT_FORMAT),
+    "size": dict(number_format=SIZE_FORMAT)
+}
+SHEET_STYLES = {
+    "header": dict(font=BOLD_FONT, fill=HEADER_FILL, border=HEADER_BORDER, alignment=CENTER_ALIGNMENT),
+    "label": dict(font=BOLD_FONT, fill=HEADER_FILL),
+    "label-title": dict(font=BOLD_FONT, fill=HEADER_FILL, border=VERTICAL_BORDER, alignment=LEFT_ALIGNMENT),
+    "label-boxed": dict(font=BOLD_FONT, fill=HEADER_FILL, border=VERTICAL_BORDER),
+    "label-heading": dict(font=BOLD_FONT, fill=HEADER_FILL, border=VERTICAL_BORDER, alignment=CENTER_ALIGNMENT),
+    "label-blank": dict(font=BOLD_FONT, fill=WHITE_FILL),
+    "label-blank-boxed": dict(font=BOLD_FONT, fill=WHITE_FILL, border=VERTICAL_BORDER),
+    "value": dict(font=FONT_ARIAL_12, fill=LIGHT_GRAY_FILL, border=VERTICAL_BORDER, alignment=CENTER_ALIGNMENT),
+    "value-currency": dict(
+        font=FONT_ARIAL_12, fill=LIGHT_GRAY_FILL, border=VERTICAL_BORDER, alignment=CENTER_ALIGNMENT,
+        number_format=CURRENCY_FORMAT
+    ),
+    "value-blank": dict(font=FONT_ARIAL_12, alignment=CENTER_ALIGNMENT),
+    "table": dict(font=FONT_ARIAL_12),
+    "table-currency": dict(font=FONT_ARIAL_12, number_format=CURRENCY_FORMAT)
+}
+
+def _style_specs():
+    specs = dict(SHEET_STYLES)
+    for name, spec in ROW_STYLES.items():
+        specs[name] = spec
+        for variant, overrides in ROW_STYLE_VARIANTS.items():
+            specs[f"{name}-{variant}"] = {**spec, **overrides}
+    return specs
+
+STYLE_SPECS = _style_specs()
+
+def register_named_styles(wb):
+    # NamedStyles bind to the workbook they are added to, so each workbook
+    # gets its own instances.
+    for name, spec in STYLE_SPECS.items():
+        wb.add_named_style(NamedStyle(name=name, **spec))
+
+def body_style(r_idx, variant=None):
+    style = "body-even" if r_idx % 2 == 0 else "body-odd"
+    return f"{style}-{variant}" if variant else style
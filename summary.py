@@ -0,0 +1,74 @@
+import pandas as pd
+
+# Situação values the Info formulas single out
+PAID_ARREMATACAO = "PG Arrematação"
+PAID_WITH_SHIPPING = "PG Arrem. + Env."
+WITHDRAWN = "PG Desistência"
+
+GROUP_KEYS = ['modalidade', 'situacao', 'sem_envio']
+
+def summary_groups(body):
+    # One groupby over Ficha body rows, keyed by everything the footer and
+    # Info formulas filter on. COUNTIF ignores case, so Modalidades are
+    # grouped in upper case.
+    nomes = body['Nome'].astype("string")
+    keys = pd.DataFrame({
+        'modalidade': body['Modalidade'].astype("string").str.upper().fillna("").to_numpy(),
+        'situacao': body['Situação'].astype("string").fillna("").to_numpy(),
+        'sem_envio': (body['Valor Env.'].isna() & body['Modalidade'].notna()).to_numpy(),
+        'nome': (nomes.notna() & (nomes != "")).to_numpy(dtype=bool),
+        'envio': body['Valor Env.'].array,
+        'arrematacao': body['Arrematação'].array,
+        'total': body['Total'].array
+    })
+    return keys.groupby(GROUP_KEYS, sort=False).agg(
+        linhas=('nome', 'size'),
+        nomes=('nome', 'sum'),
+        envio=('envio', 'sum'),
+        arrematacao=('arrematacao', 'sum'),
+        total=('total', 'sum')
+    ).reset_index()
+
+def combine_groups(groups):
+    # summary_groups of consecutive batches of rows as one; all sums are
+    # integers, so the result is exactly that of the whole body.
+    return pd.concat(groups, ignore_index=True).groupby(GROUP_KEYS, sort=False).sum().reset_index()
+
+def ficha_summary(new_df, comissao, modalidades):
+    # The last row of the Ficha is the footer
+    return groups_summary(summary_groups(new_df.iloc[:-1]), comissao, modalidades)
+
+def groups_summary(groups, comissao, modalidades):
+    # Python-side values of the Ficha footer and Info formulas, in R$.
+    situacao = groups['situacao']
+    entered = situacao != ""
+    paid = situacao.isin([PAID_ARREMATACAO, PAID_WITH_SHIPPING, WITHDRAWN])
+    envio_paid = situacao.isin([PAID_WITH_SHIPPING, WITHDRAWN])
+    paid_arrematacao = situacao == PAID_ARREMATACAO
+
+    def centavos(column, mask=None):
+        values = groups[column] if mask is None else groups.loc[mask, column]
+        return int(values.sum())
+
+    arrematacao = centavos('arrematacao')
+    comissao_total = arrematacao / 100 * (comissao / 100)
+    modalidade_rows = groups.groupby('modalidade')['linhas'].sum()
+    return {
+        'nomes': int(groups['nomes'].sum()),
+        'envios': centavos('envio') / 100,
+        'arrematacao': arrematacao / 100,
+        'total': centavos('total') / 100,
+        'pendentes': int(
+            groups.loc[~entered | paid_arrematacao, 'linhas'].sum()
+            - groups.loc[paid_arrematacao & groups['sem_envio'], 'linhas'].sum()
+        ),
+        'comissao': comissao_total,
+        'envios_a_receber': (centavos('envio') - centavos('envio', envio_paid)) / 100,
+        'arrematacao_a_receber': (arrematacao - centavos('arrematacao', paid)) / 100,
+        'comissao_a_receber': comissao_total - centavos('arrematacao', entered) / 100 * (comissao / 100),
+        'total_a_receber': (centavos('total') - centavos('total', entered)) / 100,
+        'modalidades': {
+            modalidade: int(modalidade_rows.get(modalidade.upper(), 0))
+            for modalidade in modalidades
+        }
+    }
@@ -0,0 +1,147 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+from auction_files import auction_number, find_arrematantes, find_cotacoes, find_ficha, config_path
+from batch import applicable_stages
+from config import load_config
+from pipeline import STAGES, add_trace_arguments, apply_trace_arguments, run_pipeline
+
+# Seconds between directory scans, and how long a file must keep the same
+# size and modification time before it is treated as completely written.
+POLL_INTERVAL = 0.1
+SETTLE_TIME = 0.3
+
+def changed_stages(changed_files, files):
+    # A new Arrematantes affects every stage, new Cotações the Ficha and the
+    # Lista, and a Ficha edited by staff only the Lista.
+    stages = set()
+    if find_arrematantes(changed_files):
+        stages.update(STAGES)
+    if find_cotacoes(changed_files):
+        stages.update(["record", "list"])
+    if find_ficha(changed_files):
+        stages.add("list")
+    return applicable_stages(files, [stage for stage in STAGES if stage in stages])
+
+def scan(directory):
+    # (size, mtime) of every auction file. Temporary files ("~$" Excel locks,
+    # "."-prefixed partial writes) never match the auction file names.
+    snapshot = {}
+    for entry in os.scandir(directory):
+        if entry.is_file() and auction_number(entry.name):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+class FolderWatcher:
+    # Keeps the stage modules imported between runs and remembers the last
+    # state of each auction file, including the outputs it wrote itself, so
+    # only changes made by someone else trigger a run. Fichas are updated in
+    # place by default: nobody is there to notice a rebuild wiping the
+    # Situação and Observação staff typed in.
+    def __init__(self, directory=None, streaming=False, use_cache=True, update=True, settle_time=SETTLE_TIME):
+        self.directory = os.path.abspath(directory or os.getcwd())
+        self.streaming = streaming
+        self.use_cache = use_cache
+        self.update = update
+        self.settle_time = settle_time
+        self.seen = scan(self.directory)
+        self.pending = {}
+
+    def ready_files(self, snapshot, now):
+        ready = []
+        for name, state in snapshot.items():
+            if self.seen.get(name) == state:
+                self.pending.pop(name, None)
+            elif name in self.pending and self.pending[name][0] == state:
+                if now - self.pending[name][1] >= self.settle_time:
+                    ready.append(name)
+            else:
+                self.pending[name] = (state, now)
+        for name in list(self.seen):
+            if name not in snapshot:
+                del self.seen[name]
+        for name in list(self.pending):
+            if name not in snapshot:
+                del self.pending[name]
+        return ready
+
+    def poll(self, now=None):
+        # Runs the stages for every auction whose files settled since the
+        # last poll and returns {number: (stages, seconds or error)}.
+        snapshot = scan(self.directory)
+        ready = self.ready_files(snapshot, time.monotonic() if now is None else now)
+        by_number = {}
+        for name in ready:
+            self.seen[name] = snapshot[name]
+            del self.pending[name]
+            by_number.setdefault(auction_number(name), []).append(name)
+        results = {}
+        for number, changed_files in sorted(by_number.items()):
+            files = [name for name in snapshot if auction_number(name) == number]
+            stages = changed_stages(changed_files, files)
+            if stages:
+                results[number] = (stages, self.run(stages, files))
+                self.skip_outputs(number, stages)
+        return results
+
+    def skip_outputs(self, number, stages):
+        # The Cotações and Ficha the stages just wrote are not changes to
+        # react to: a fresh Cotações still has to be filled in by staff.
+        for name, state in scan(self.directory).items():
+            if auction_number(name) != number:
+                continue
+            if ("quotes" in stages and find_cotacoes([name])) or ("record" in stages and find_ficha([name])):
+                self.seen[name] = state
+                self.pending.pop(name, None)
+
+    def run(self, stages, files):
+        start = time.perf_counter()
+        try:
+            # Parsed again only after valores.ini is saved
+            config = load_config(config_path(self.directory))
+            run_pipeline(
+                stages, self.directory, self.streaming, self.use_cache, files=files,
+                update=self.update, config=config
+            )
+        except Exception as e:
+            # A bad or half-filled file must not stop the watcher; the next
+            # save of that file triggers another run.
+            return f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start
+
+    def watch(self, interval=POLL_INTERVAL, stop=None):
+        print(f"Watching {self.directory} for auction files (Ctrl+C to stop)")
+        while stop is None or not stop.is_set():
+            for number, (stages, outcome) in self.poll().items():
+                detail = f"done in {outcome:.2f}s" if isinstance(outcome, float) else f"failed: {outcome}"
+                print(f"{time.strftime('%H:%M:%S')} {number} {', '.join(stages)} {detail}", flush=True)
+            time.sleep(interval)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the auction outputs whenever auction files are saved in a folder.")
+    parser.add_argument("directory", nargs="?", default=os.getcwd(), help="folder to watch (defaults to the current directory)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between folder scans")
+    parser.add_argument("--settle", type=float, default=SETTLE_TIME, help="seconds a file must stay unchanged before it is processed")
+    parser.add_argument("--streaming", action="store_true", help="write the workbooks in write-only mode")
+    parser.add_argument("--no-cache", action="store_true", help="parse the input files again instead of using the cache")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild Fichas from scratch instead of updating them in place (discards Situação and Observação)")
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    apply_trace_arguments(parser, args)
+    # Import the stages now so the first save does not pay for it.
+    for module in ("quotes", "record", "list"):
+        importlib.import_module(module)
+    watcher = FolderWatcher(args.directory, args.streaming, not args.no_cache, not args.rebuild, args.settle)
+    try:
+        watcher.watch(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.datavalidation import DataValidation
+from instrumentation import span
+from styles import register_named_styles
+
+def new_workbook(streaming=False):
+    # Write-only workbooks serialize each row as soon as it is appended, so
+    # the sheet writers emit every row once, in order, with its final
+    # formatting; the same code then drives both kinds of workbook.
+    wb = Workbook(write_only=streaming)
+    if not streaming:
+        wb.remove(wb.active)
+    with span("style"):
+        register_named_styles(wb)
+    return wb
+
+def styled_cell(ws, value=None, style=None):
+    cell = WriteOnlyCell(ws, value=None if isinstance(value, str) and not value else value)
+    if style is not None:
+        cell.style = style
+    return cell
+
+def saved_value(value):
+    # openpyxl stores floats with 16 significant digits and missing values as
+    # empty cells; mirror that so in-memory rows round exactly like the file.
+    if value is None or value != value or (isinstance(value, str) and not value):
+        return None
+    if isinstance(value, float):
+        return float("%.16g" % value)
+    return value
+
+def add_list_validation(ws, options, sqref):
+    dv = DataValidation(type="list", formula1=f"\"{','.join(options)}\"", showDropDown=False)
+    dv.showErrorMessage = True
+    dv.add(sqref)
+    ws.data_validations.append(dv)
+    return dv
+
+def set_column_widths(ws, column_widths):
+    for col, width in column_widths.items():
+        ws.column_dimensions[col].width = width